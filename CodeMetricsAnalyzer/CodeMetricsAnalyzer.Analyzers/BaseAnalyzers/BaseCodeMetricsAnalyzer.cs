@@ -1,10 +1,12 @@
 ﻿using System;
 using System.Collections.Generic;
 using System.Collections.Immutable;
+using System.Globalization;
 using System.Linq;
 using System.Text;
 using System.Threading.Tasks;
 using CodeMetricsAnalyzer.Analyzers.Configurations;
+using CodeMetricsAnalyzer.Analyzers.Diagnostics;
 using Microsoft.CodeAnalysis;
 using Microsoft.CodeAnalysis.CSharp;
 using Microsoft.CodeAnalysis.Diagnostics;
@@ -27,10 +29,24 @@ namespace CodeMetricsAnalyzer.Analyzers.BaseAnalyzers
         }
 
         protected static void ReportDiagnostics(SyntaxNodeAnalysisContext context, DiagnosticDescriptor descriptor, Location? location, params object?[]? messageArgs)
+        {
+            ReportDiagnosticsWithProperties(context, descriptor, location, ImmutableDictionary<string, string?>.Empty, messageArgs);
+        }
+
+        protected static void ReportMetricDiagnostics(SyntaxNodeAnalysisContext context, DiagnosticDescriptor descriptor, Location? location, double metricValue, params object?[]? messageArgs)
+        {
+            // The exact metric value lets consumers evaluate any threshold without running the analysis again
+            var properties = ImmutableDictionary<string, string?>.Empty
+                .Add(DiagnosticProperties.MetricValue, metricValue.ToString("R", CultureInfo.InvariantCulture));
+
+            ReportDiagnosticsWithProperties(context, descriptor, location, properties, messageArgs);
+        }
+
+        private static void ReportDiagnosticsWithProperties(SyntaxNodeAnalysisContext context, DiagnosticDescriptor descriptor, Location? location, ImmutableDictionary<string, string?> properties, object?[]? messageArgs)
         {
             if (location is null || location == Location.None)
             {
-                var diagnosticWithoutLocation = Diagnostic.Create(descriptor, location, messageArgs);
+                var diagnosticWithoutLocation = Diagnostic.Create(descriptor, location, properties, messageArgs);
                 context.ReportDiagnostic(diagnosticWithoutLocation);
                 return;
             }
@@ -42,7 +58,7 @@ namespace CodeMetricsAnalyzer.Analyzers.BaseAnalyzers
             }
 
             var newLocation = Location.Create(syntaxTree, location!.SourceSpan);
-            var diagnostic = Diagnostic.Create(descriptor, newLocation, messageArgs);
+            var diagnostic = Diagnostic.Create(descriptor, newLocation, properties, messageArgs);
 
             context.ReportDiagnostic(diagnostic);
         }
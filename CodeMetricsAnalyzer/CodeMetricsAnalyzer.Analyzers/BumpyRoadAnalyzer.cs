@@ -41,10 +41,11 @@ namespace CodeMetricsAnalyzer.Analyzers
 
             if (bumpyRoadMetric > _config.BumpyRoadAnalysis.BumpynessThreshold) // threshold
             {
-                ReportDiagnostics(
+                ReportMetricDiagnostics(
                     context, 
                     DiagnosticDescriptors.BumpyRoadRule, 
                     methodDeclaration.Identifier.GetLocation(), 
+                    bumpyRoadMetric,
                     methodDeclaration.Identifier.Text, 
                     bumpyRoadMetric);
             }
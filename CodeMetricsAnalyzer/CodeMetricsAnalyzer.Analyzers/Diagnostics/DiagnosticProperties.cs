@@ -0,0 +1,13 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Threading.Tasks;
+
+namespace CodeMetricsAnalyzer.Analyzers.Diagnostics
+{
+    public static class DiagnosticProperties
+    {
+        public const string MetricValue = "MetricValue";
+    }
+}
@@ -21,10 +21,11 @@ namespace CodeMetricsAnalyzer.Analyzers
 
             if (parameterCount > _config.FunctionParameterCountAnalysis.ParameterCountThreshold)
             {
-                ReportDiagnostics(
+                ReportMetricDiagnostics(
                     context,
                     DiagnosticDescriptors.FunctionParameterCountRule,
                     methodDeclaration.Identifier.GetLocation(),
+                    parameterCount,
                     methodDeclaration.Identifier.Text,
                     parameterCount,
                     _config.FunctionParameterCountAnalysis.ParameterCountThreshold);
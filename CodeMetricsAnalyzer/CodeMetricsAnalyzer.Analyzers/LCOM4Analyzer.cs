@@ -114,10 +114,11 @@ public class LCOM4Analyzer(AnalyzerConfiguration config) : ClassAnalyzer(config)
 
         if (components > _config.LCOM4Analysis.CohesionThreshold)
         {
-            ReportDiagnostics(
+            ReportMetricDiagnostics(
                 context,
                 DiagnosticDescriptors.LCOM4Rule,
                 classDecl.Identifier.GetLocation(),
+                components,
                 classSymbol.Name,
                 components);
         }
@@ -105,10 +105,11 @@ public class LCOM5Analyzer(AnalyzerConfiguration config) : ClassAnalyzer(config)
 
         if (LCOM5 > _config.LCOM5Analysis.CohesionThreshold)
         {
-            ReportDiagnostics(
+            ReportMetricDiagnostics(
                 context,
                 DiagnosticDescriptors.LCOM5Rule,
                 classDeclaration.Identifier.GetLocation(),
+                LCOM5,
                 classSymbol.Name, LCOM5);
         }
     }
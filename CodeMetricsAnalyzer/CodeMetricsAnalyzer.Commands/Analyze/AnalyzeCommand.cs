@@ -6,10 +6,12 @@ using Microsoft.CodeAnalysis.MSBuild;
 using System;
 using System.Collections.Generic;
 using System.Collections.Immutable;
+using System.Globalization;
 using System.Linq;
 using System.Text;
 using System.Threading.Tasks;
 using CodeMetricsAnalyzer.Analyzers;
+using CodeMetricsAnalyzer.Analyzers.Diagnostics;
 using Microsoft.Build.Locator;
 
 namespace CodeMetricsAnalyzer.Commands.Analyze
@@ -41,6 +43,10 @@ namespace CodeMetricsAnalyzer.Commands.Analyze
             {
                 return 2;
             }
+            finally
+            {
+                _workspace?.Dispose();
+            }
         }
 
         private async Task AnalyzeAsync(CancellationToken cancellationToken = default)
@@ -83,7 +89,11 @@ namespace CodeMetricsAnalyzer.Commands.Analyze
 
         private void CreateWorkspace()
         {
-            MSBuildLocator.RegisterDefaults();
+            // MSBuild can only be registered once per process, the serve command runs many analyses
+            if (!MSBuildLocator.IsRegistered)
+            {
+                MSBuildLocator.RegisterDefaults();
+            }
 
             _workspace = MSBuildWorkspace.Create();
         }
@@ -164,11 +174,23 @@ namespace CodeMetricsAnalyzer.Commands.Analyze
                     {
                         Line = diagnostic.Location.GetMappedLineSpan().StartLinePosition.Line + 1,
                         Character = diagnostic.Location.GetMappedLineSpan().StartLinePosition.Character + 1
-                    }
+                    },
+                    MetricValue = GetMetricValue(diagnostic)
                 }).ToList()
             };
         }
 
+        private static double? GetMetricValue(Diagnostic diagnostic)
+        {
+            if (diagnostic.Properties.TryGetValue(DiagnosticProperties.MetricValue, out var value)
+                && double.TryParse(value, NumberStyles.Float, CultureInfo.InvariantCulture, out var metricValue))
+            {
+                return metricValue;
+            }
+
+            return null;
+        }
+
         private static void WriteAnalysisResults(IEnumerable<ProjectDiagnosticsDto> results)
         {
             ConsoleWriteLineWithColor(ConsoleColor.Cyan, "Analysis results:");
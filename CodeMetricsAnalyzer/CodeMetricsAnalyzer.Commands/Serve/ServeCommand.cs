@@ -0,0 +1,88 @@
+﻿using CodeMetricsAnalyzer.Commands.Analyze;
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Text.Json;
+using System.Threading.Tasks;
+
+namespace CodeMetricsAnalyzer.Commands.Serve
+{
+    public class ServeCommand
+    {
+        private static readonly JsonSerializerOptions JsonOptions = new()
+        {
+            PropertyNamingPolicy = JsonNamingPolicy.CamelCase
+        };
+
+        private readonly ServeCommandOptions _options;
+
+        public ServeCommand(ServeCommandOptions options)
+        {
+            _options = options;
+        }
+
+        public async Task<int> RunServerAsync(CancellationToken cancellationToken = default)
+        {
+            // Responses are written to the original standard output, the analysis output goes to standard error
+            var responseWriter = Console.Out;
+            Console.SetOut(Console.Error);
+
+            string? line;
+            while ((line = await Console.In.ReadLineAsync(cancellationToken)) is not null)
+            {
+                if (string.IsNullOrWhiteSpace(line))
+                {
+                    continue;
+                }
+
+                var response = await HandleRequestAsync(line, cancellationToken);
+
+                await responseWriter.WriteLineAsync(JsonSerializer.Serialize(response, JsonOptions));
+                await responseWriter.FlushAsync();
+            }
+
+            return 0;
+        }
+
+        private async Task<ServeResponse> HandleRequestAsync(string line, CancellationToken cancellationToken = default)
+        {
+            ServeRequest? request;
+            try
+            {
+                request = JsonSerializer.Deserialize<ServeRequest>(line, JsonOptions);
+            }
+            catch (JsonException e)
+            {
+                return new ServeResponse { ExitCode = 2, Error = e.Message };
+            }
+
+            if (request is null)
+            {
+                return new ServeResponse { ExitCode = 2, Error = "Empty request." };
+            }
+
+            var source = new FileInfo(request.Source);
+            if (!source.Exists || (source.Extension != ".sln" && source.Extension != ".csproj"))
+            {
+                return new ServeResponse { Id = request.Id, ExitCode = 2, Error = "The provided source path is invalid." };
+            }
+
+            // Reloaded for every request, so configuration changes do not need a restart
+            var analyzerConfiguration = await _options.LoadAnalyzerConfigurationAsync(cancellationToken);
+
+            var analyzeCommand = new AnalyzeCommand(new AnalyzeCommandOptions
+            {
+                Source = source,
+                Output = request.Output,
+                AnalyzerConfiguration = analyzerConfiguration
+            });
+
+            return new ServeResponse
+            {
+                Id = request.Id,
+                ExitCode = await analyzeCommand.RunAnalysisAsync(cancellationToken)
+            };
+        }
+    }
+}
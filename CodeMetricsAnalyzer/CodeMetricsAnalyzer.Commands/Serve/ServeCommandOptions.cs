@@ -0,0 +1,14 @@
+﻿using CodeMetricsAnalyzer.Analyzers.Configurations;
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Threading.Tasks;
+
+namespace CodeMetricsAnalyzer.Commands.Serve
+{
+    public class ServeCommandOptions
+    {
+        public Func<CancellationToken, Task<AnalyzerConfiguration>> LoadAnalyzerConfigurationAsync { get; set; } = null!;
+    }
+}
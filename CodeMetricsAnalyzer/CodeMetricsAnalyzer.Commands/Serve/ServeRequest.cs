@@ -0,0 +1,15 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Threading.Tasks;
+
+namespace CodeMetricsAnalyzer.Commands.Serve
+{
+    public class ServeRequest
+    {
+        public int Id { get; set; }
+        public string Source { get; set; } = null!;
+        public string? Output { get; set; }
+    }
+}
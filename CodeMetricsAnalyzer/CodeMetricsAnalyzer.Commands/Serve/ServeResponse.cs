@@ -0,0 +1,15 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Threading.Tasks;
+
+namespace CodeMetricsAnalyzer.Commands.Serve
+{
+    public class ServeResponse
+    {
+        public int Id { get; set; }
+        public int ExitCode { get; set; }
+        public string? Error { get; set; }
+    }
+}
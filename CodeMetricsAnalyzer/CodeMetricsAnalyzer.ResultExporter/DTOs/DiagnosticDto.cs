@@ -9,4 +9,5 @@ public class DiagnosticDto
     public string Message { get; set; }
     public string FilePath { get; set; }
     public LocationDto Location { get; set; }
+    public double? MetricValue { get; set; }
 }
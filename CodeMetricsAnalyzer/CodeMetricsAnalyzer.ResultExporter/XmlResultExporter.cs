@@ -1,4 +1,5 @@
-﻿using System.Xml;
+﻿using System.Globalization;
+using System.Xml;
 using System.Xml.Linq;
 
 namespace CodeMetricsAnalyzer.ResultExporter;
@@ -51,7 +52,10 @@ public class XmlResultExporter : IResultExporter
                                 "Location",
                                 new XAttribute("Line", diagnostic.Location.Line),
                                 new XAttribute("Character", diagnostic.Location.Character)
-                            )
+                            ),
+                            diagnostic.MetricValue is null
+                                ? null
+                                : new XElement("MetricValue", diagnostic.MetricValue.Value.ToString("R", CultureInfo.InvariantCulture))
                         ))
                 )
             ));
@@ -9,6 +9,7 @@ using Microsoft.CodeAnalysis;
 using Microsoft.CodeAnalysis.Diagnostics;
 using System.Runtime.InteropServices;
 using CodeMetricsAnalyzer.Commands.Analyze;
+using CodeMetricsAnalyzer.Commands.Serve;
 using CodeMetricsAnalyzer.Analyzers.Configurations;
 
 namespace CodeMetricsAnalyzer;
@@ -19,7 +20,8 @@ public class Program
     {
         var rootCommand = new RootCommand
         {
-            CreateAnalyzeCommand()
+            CreateAnalyzeCommand(),
+            CreateServeCommand()
         };
 
         await rootCommand.InvokeAsync(args);
@@ -79,6 +81,26 @@ public class Program
         return command;
     }
 
+    private static Command CreateServeCommand()
+    {
+        var command = new Command("serve", "Keeps running and analyzes the projects or solutions requested as JSON lines on the standard input.");
+
+        command.SetHandler(async (InvocationContext context) =>
+        {
+            var cancellationToken = context.GetCancellationToken();
+
+            var options = new ServeCommandOptions
+            {
+                LoadAnalyzerConfigurationAsync = LoadAppSettingsAsync
+            };
+
+            var serveCommand = new ServeCommand(options);
+            context.ExitCode = await serveCommand.RunServerAsync(cancellationToken);
+        });
+
+        return command;
+    }
+
     private static async Task<AnalyzerConfiguration> LoadAppSettingsAsync(CancellationToken cancellationToken = default)
     {
         var directory = new FileInfo(Assembly.GetExecutingAssembly().Location).Directory?.FullName;
@@ -1,13 +1,34 @@
 import os
-import re
 import json
+import hashlib
 import subprocess
+import tempfile
+import atexit
+import threading
+import time
 import git
 import yaml
-import requests
 import xml.etree.ElementTree as ET
 from glob import glob
-from milestone_commit_finder import get_milestone_commits
+from milestone_commit_finder import get_milestone_commits, get_all_milestone_commits
+from gitlab_client import client
+from worktree_manager import checkout_worktree, prune_worktrees
+from result_cache import get_commit_sha, get_tree_hash, get_analyzer_fingerprint, get_cached_result, store_result
+from solution_parser import discover_solutions, rank_solutions
+from unity_solution import (
+    UNITY_GENERATOR, is_unity_project, list_unity_files, get_unity_cache_key, restore_unity_solution,
+    store_unity_solution, generate_asmdef_solution
+)
+from git_history import resolve_commits_before
+from clone_manager import ensure_clone, clone_all
+from metrics_ingestion import find_metrics_files, load_metrics, average_project_metrics
+from job_queue import run_jobs, get_results, make_job_key
+from pipeline import Pipeline, Stage
+from profiler import span, traced, start_run, finish_run
+from results_store import make_row, store_rows, WRITE_JSON
+from process_runner import (
+    run_step, record_status, get_log_key, get_timeout, get_log_path, get_process_group_args, kill_process_tree
+)
 
 # === Load Configuration ===
 with open("config.yml", "r") as file:
@@ -23,14 +44,44 @@ ANALYZER_DIR = config["analyzer"]["project_dir"]
 ANALYZER_PROJECT_FILE = config["analyzer"]["project_file"]
 UNITY_PATH = config["analyzer"]["unity_path"]
 UNITY_VERSION = config["analyzer"]["unity_version"]
-
-HEADERS = {"PRIVATE-TOKEN": TOKEN}
+WORKERS = config["analyzer"].get("workers", 1)
+ANALYZER_DLL = config["analyzer"].get("dll_path", "")
+USE_DAEMON = config["analyzer"].get("daemon", True)
+DAEMON_MAX_REQUESTS = config["analyzer"].get("daemon_max_requests", 50)
+NUGET_PACKAGES = config["analyzer"].get("nuget_packages", "")  # Shared NuGet package folder, "" = NuGet's default
+METRICS_PACKAGE_VERSION = config["analyzer"].get("metrics_package_version", "3.3.4")
+
+PIPELINE_CONFIG = config.get("pipeline", {})
+PIPELINE_ENABLED = PIPELINE_CONFIG.get("enabled", False)  # Overlap the stages of different projects
+PIPELINE_QUEUE_SIZE = PIPELINE_CONFIG.get("queue_size", 2)  # Projects waiting in front of a stage
+PIPELINE_WORKERS = PIPELINE_CONFIG.get("workers", {})  # Per stage overrides of DEFAULT_STAGE_WORKERS
+DEFAULT_STAGE_WORKERS = {
+    "metadata": config["gitlab"].get("max_concurrency", 8),
+    "clone": config.get("clone", {}).get("max_concurrency", 4),
+    "checkout": 2,
+    "restore": 2,
+    "build": os.cpu_count() or 1,
+    "analyze": os.cpu_count() or 1,
+    "ingest": 1,
+}
+
+# Adds Microsoft.CodeAnalysis.Metrics to every project of a solution without touching its files
+METRICS_PROPS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics.props")
+
+# Solution of every git tree found by this process, relative to the checkout
+_solution_paths = {}
+
+DIAGNOSTIC_SCORES = {
+    "CMA0001": "bumpy_score",
+    "CMA0002": "fpc_score",
+    "CMA0003": "lcom4_score",
+    "CMA0004": "lcom5_score",
+}
 
 def get_project_info(project_id):
     """Fetch project information from GitLab to get the correct HTTP URL."""
-    url = f"{GITLAB_URL}/projects/{project_id}"
-    response = requests.get(url, headers=HEADERS)
-    
+    response = client.get(f"projects/{project_id}")
+
     if response.status_code == 200:
         project_data = response.json()
         return project_data["http_url_to_repo"]  # Return the HTTP URL for cloning
@@ -39,29 +90,24 @@ def get_project_info(project_id):
         return None
 
 
-def clone_repo(project_id):
-    """Clone the GitLab repository if not cloned yet, using the correct URL."""
-    repo_path = os.path.join(CLONE_DIR, str(project_id))
-
+def get_clone_url(project_id):
+    """Look up the authenticated clone URL of a project, None if GitLab does not know it."""
     repo_url = get_project_info(project_id)  # Get the correct repository URL
     if not repo_url:
         print(f"⚠ Skipping project {project_id} - Repository URL not found")
         return None
 
     # add auth token
-    repo_url = repo_url.replace("https://", f"https://oauth2:{TOKEN}@")
+    return repo_url.replace("https://", f"https://oauth2:{TOKEN}@")
 
-    if not os.path.exists(repo_path):
-        print(f"🔄 Cloning repository {project_id} from {repo_url} ...")
-        os.makedirs(CLONE_DIR, exist_ok=True)
-        git.Repo.clone_from(repo_url, repo_path)
-    else:
-        print(f"✅ Repository {project_id} already exists.")
-        # repo = git.Repo(repo_path)
-        # repo.remotes.origin.pull()
 
-    return repo_path
+def clone_repo(project_id, refs=None):
+    """Clone the GitLab repository or fetch its new commits, using the correct URL."""
+    repo_url = get_clone_url(project_id)
+    if not repo_url:
+        return None
 
+    return ensure_clone(repo_url, os.path.join(CLONE_DIR, str(project_id)), refs)
 
 
 def checkout_commit(repo_path, commit_id):
@@ -70,249 +116,717 @@ def checkout_commit(repo_path, commit_id):
     repo.git.checkout(commit_id, force=True)
     print(f"Checked out commit {commit_id}")
 
-def add_metrics_package_to_all_projects(repo_path):
-    """Adds Microsoft.CodeAnalysis.Metrics to all .csproj files in the repo."""
-    print("📦 Adding Microsoft.CodeAnalysis.Metrics to all projects...")
-
-    for root, dirs, files in os.walk(repo_path):
-        for file in files:
-            if file.endswith(".csproj"):
-                project_path = os.path.join(root, file)
-                print(f"➡️ Adding package to {project_path}")
-                try:
-                    subprocess.run(["dotnet", "add", project_path, "package", "Microsoft.CodeAnalysis.Metrics"],
-                                   check=True, capture_output=True, text=True)
-                except subprocess.CalledProcessError as e:
-                    print(f"❌ Failed to add package to {project_path}: {e.stderr or e.stdout}")
-
+@traced("parse_metrics")
 def aggregate_project_builtin_metrics(metrics_files):
     """Aggregate and average project metrics from multiple metrics.xml files."""
-    sum_metrics = {
-        "MaintainabilityIndex": 0,
-        "CyclomaticComplexity": 0,
-        "ClassCoupling": 0,
-        "DepthOfInheritance": 0,
-    }
+    return average_project_metrics(load_metrics(metrics_files))
 
-    total_metrics = {
-        "SourceLines": 0,
-        "ExecutableLines": 0,
-    }
 
-    contributing_projects = 0
+def get_dotnet_env():
+    """Environment of the dotnet commands building the analyzed solutions."""
+    env = {**os.environ, "DOTNET_CLI_TELEMETRY_OPTOUT": "1", "DOTNET_NOLOGO": "1"}
+    if NUGET_PACKAGES:
+        env["NUGET_PACKAGES"] = os.path.abspath(NUGET_PACKAGES)
+    return env
 
-    for file in metrics_files:
-        try:
-            tree = ET.parse(file)
-            root = tree.getroot()
-            metrics = root.find(".//Metrics")
-            if metrics is None:
-                continue
 
-            for metric in metrics.findall("Metric"):
-                name = metric.attrib.get("Name")
-                value = metric.attrib.get("Value")
-                if name in sum_metrics:
-                    sum_metrics[name] += int(value)
-                elif name in total_metrics:
-                    total_metrics[name] += int(value)
+def get_metrics_fingerprint():
+    """Hash the metrics package version and the overlay, the built-in metrics depend on both."""
+    hasher = hashlib.sha256(METRICS_PACKAGE_VERSION.encode())
+    with open(METRICS_PROPS_PATH, "rb") as f:
+        hasher.update(f.read())
+    return hasher.hexdigest()
 
-            contributing_projects += 1
 
-        except Exception as e:
-            print(f"⚠️ Error parsing {file}: {e}")
+def get_job_fingerprint():
+    """Hash the configuration a job result depends on: analyzer build, appsettings.json and the metrics package."""
+    return hashlib.sha256(f"{get_analyzer_fingerprint()}:{get_metrics_fingerprint()}".encode()).hexdigest()
 
-    if contributing_projects == 0:
-        return None
 
-    # Compute averages
-    averaged_metrics = {
-        name: round(value / contributing_projects)
-        for name, value in sum_metrics.items()
-    }
+def get_metrics_properties():
+    """MSBuild properties injecting the metrics package through the Directory.Build.props overlay."""
+    return [
+        f"/p:DirectoryBuildPropsPath={METRICS_PROPS_PATH}",
+        f"/p:CodeMetricsPackageVersion={METRICS_PACKAGE_VERSION}",
+    ]
 
-    # Merge totals
-    averaged_metrics.update(total_metrics)
 
-    return averaged_metrics
+def restore_solution(solution_path):
+    """Restore the packages of a solution, including the metrics package of the overlay."""
+    try:
+        run_step(
+            "restore", ["dotnet", "restore", solution_path, *get_metrics_properties()],
+            get_log_key(os.path.dirname(solution_path)), env=get_dotnet_env()
+        )
+        return True
+    except subprocess.SubprocessError as e:
+        print(f"❌ Restore error: {e}.")
+        return False
+
+
+def build_solution(solution_path, restore=True):
+    """Restore and build a solution once, later steps reuse the restored packages and the build output.
+
+    Pass restore=False when restore_solution already succeeded.
+    """
+    restored = restore_solution(solution_path) if restore else True
+    build_command = ["dotnet", "build", solution_path, *get_metrics_properties()]
+    if restored:
+        build_command.append("--no-restore")
 
+    try:
+        run_step("build", build_command, get_log_key(os.path.dirname(solution_path)), env=get_dotnet_env())
+        return True
+    except subprocess.SubprocessError as e:
+        print(f"❌ Build error: {e}. Trying to run analyzer without build.")
+        return False
 
 
-def run_builtin_roslyn_metrics(repo_path):
-    """Run Roslyn built-in metrics analyzer."""
-    project_path = os.path.join(ANALYZER_DIR, ANALYZER_PROJECT_FILE)
+def restore_commit(task):
+    """Pipeline stage: reuse the cached results of a checked out commit, or locate and restore its solution."""
+    repo_path = task["worktree_path"]
+    commit_sha = get_commit_sha(repo_path)
+    analysis_result = get_cached_result("analyzers", commit_sha, get_analyzer_fingerprint())
+    builtin_analysis_result = get_cached_result("builtin_metrics", commit_sha, get_metrics_fingerprint())
+    if analysis_result and builtin_analysis_result:
+        print(f"♻️ Using cached results for commit {commit_sha}")
+        return {**task, "analysis_result": analysis_result, "builtin_analysis_result": builtin_analysis_result}
+
     solution_path = find_solution_file(repo_path)
     if not solution_path:
         print("❌ No solution found.")
         return None
 
+    return {**task, "solution_path": solution_path, "restored": restore_solution(solution_path)}
+
+
+def build_commit(task):
+    """Pipeline stage: build the restored solution, unless the results are cached."""
+    if "solution_path" in task:
+        build_solution(task["solution_path"], restore=not task["restored"])
+    return task
+
+
+def analyze_built_commit(task):
+    """Pipeline stage: run the custom analyzers and the built-in metrics on the build."""
+    if "solution_path" not in task:
+        return task
+
+    repo_path = task["worktree_path"]
+    return {
+        **task,
+        "analysis_result": run_analyzers(repo_path, task["solution_path"]),
+        "builtin_analysis_result": run_builtin_roslyn_metrics(repo_path, task["solution_path"]),
+    }
+
+
+COMMIT_STEPS = [restore_commit, build_commit, analyze_built_commit]
+
+
+def run_steps(steps, task):
+    """Run pipeline stage functions one after the other, stopping when a stage drops the task."""
+    for step in steps:
+        task = step(task)
+        if task is None:
+            return None
+    return task
+
+
+def analyze_commit(repo_path):
+    """Build a checked out commit once and run the custom analyzers and the built-in metrics on that build."""
+    task = run_steps(COMMIT_STEPS, {"worktree_path": repo_path})
+    if task is None:
+        return None, None
+    return task["analysis_result"], task["builtin_analysis_result"]
+
+
+def run_builtin_roslyn_metrics(repo_path, solution_path=None):
+    """Run Roslyn built-in metrics analyzer, building the solution first unless it is already built."""
+    commit_sha = get_commit_sha(repo_path)
+    fingerprint = get_metrics_fingerprint()
+    cached_result = get_cached_result("builtin_metrics", commit_sha, fingerprint)
+    if cached_result:
+        print(f"♻️ Using cached built-in metrics for commit {commit_sha}")
+        return cached_result
+
+    if solution_path is None:
+        solution_path = find_solution_file(repo_path)
+        if not solution_path:
+            print("❌ No solution found.")
+            return None
+        build_solution(solution_path)
+
     print(f"🚀 Running built-in Roslyn metrics for {repo_path} ...")
-    
-    add_metrics_package_to_all_projects(repo_path)
 
     try:
-        build_command = [
-        "dotnet", "build", solution_path
-        ]
-        subprocess.run(build_command, capture_output=True, text=True, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Build error: {e}. Trying to run analyzer without build.")
-    
-    try:                
+        # dotnet msbuild does not restore, the Metrics target runs on the restored packages of the build
         analyze_command = [
-        "dotnet", "msbuild", solution_path, "/t:Metrics"
+        "dotnet", "msbuild", solution_path, "/t:Metrics", *get_metrics_properties()
         ]
-        subprocess.run(analyze_command, capture_output=True, text=True, check=True)
+        run_step("metrics", analyze_command, get_log_key(repo_path), env=get_dotnet_env())
     
-        # Find all generated *.Metrics.xml files under this solution's directory
-        metrics_files = glob(os.path.join(repo_path, "**", "*.Metrics.xml"), recursive=True)
+        # The Metrics target writes <Project>.Metrics.xml next to every project of the solution
+        metrics_files = find_metrics_files(solution_path)
         print(f"🔍 Found {len(metrics_files)} metrics files.")
 
         aggregated = aggregate_project_builtin_metrics(metrics_files)
         if aggregated:
+            store_result("builtin_metrics", commit_sha, aggregated, fingerprint)
             return aggregated
     
-    except subprocess.CalledProcessError as e:
+    except subprocess.SubprocessError as e:
         print(f"❌ Error running analyzer: {e}")
         return None
    
 
-def run_analyzers(repo_path):
-    """Run the roslyn analyzers."""
+def build_analyzer():
+    """Build the analyzer project, so its assembly and appsettings.json can be used directly."""
     project_path = os.path.join(ANALYZER_DIR, ANALYZER_PROJECT_FILE)
-    solution_path = find_solution_file(repo_path)
-    if not solution_path:
-        print("❌ No solution found.")
-        return None
+    try:
+        run_step("analyzer_build", ["dotnet", "build", project_path], "analyzer")
+        return True
+    except subprocess.SubprocessError as e:
+        print(f"❌ Error building analyzer: {e}. Falling back to `dotnet run`.")
+        return False
+
+
+def run_analyzers(repo_path, solution_path=None):
+    """Run the roslyn analyzers, building the solution first unless it is already built."""
+    commit_sha = get_commit_sha(repo_path)
+    fingerprint = get_analyzer_fingerprint()
+    cached_result = get_cached_result("analyzers", commit_sha, fingerprint)
+    if cached_result:
+        print(f"♻️ Using cached analyzer results for commit {commit_sha}")
+        return cached_result
+
+    if solution_path is None:
+        solution_path = find_solution_file(repo_path)
+        if not solution_path:
+            print("❌ No solution found.")
+            return None
+        build_solution(solution_path)
 
     print(f"🚀 Running analyzers for {repo_path} ...")
 
-    try:
-        build_command = [
-        "dotnet", "build", solution_path
-        ]
-        subprocess.run(build_command, capture_output=True, text=True, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Build error: {e}. Trying to run analyzer without build.")
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "analysis_results.xml")
+        try:
+            export_analyzer_results(solution_path, output_path)
+        except subprocess.SubprocessError as e:
+            print(f"❌ Error running analyzer: {e}")
+            return None
+
+        if not os.path.exists(output_path):
+            print(f"❌ Analyzer did not write its results to {output_path}")
+            return None
 
-    try:        
+        formatted_result = parse_analyzer_results(output_path, repo_path)
+
+    store_result("analyzers", commit_sha, formatted_result, fingerprint)
+    return formatted_result
+
+
+@traced("parse_analyzer_results")
+def parse_analyzer_results(output_path, repo_path):
+    """Stream-parse the analyzer XML output into summary counts and per-project and per-file breakdowns."""
+    result = {score: 0 for score in DIAGNOSTIC_SCORES.values()}
+    projects = {}
+    files = {}
+
+    current_project = None
+    for event, element in ET.iterparse(output_path, events=("start", "end")):
+        if event == "start":
+            if element.tag == "Project":
+                current_project = get_relative_path(element.attrib.get("FilePath", ""), repo_path)
+                projects.setdefault(current_project, {score: 0 for score in DIAGNOSTIC_SCORES.values()})
+            continue
+
+        if element.tag == "Project":
+            current_project = None
+            element.clear()
+            continue
+
+        if element.tag != "Diagnostic":
+            continue
+
+        score = DIAGNOSTIC_SCORES.get(element.attrib.get("Id"))
+        if score is None:
+            element.clear()
+            continue
+
+        if current_project is None:
+            # Diagnostic groups of the summary section
+            result[score] = int(element.attrib.get("Count", 0))
+        else:
+            projects[current_project][score] += 1
+            file_path = get_relative_path(element.findtext("FilePath", ""), repo_path)
+            if file_path:
+                files.setdefault(file_path, {score: 0 for score in DIAGNOSTIC_SCORES.values()})
+                files[file_path][score] += 1
+
+        element.clear()
+
+    result["projects"] = projects
+    result["files"] = files
+    return result
+
+
+def get_relative_path(path, repo_path):
+    """Make a path reported by the analyzer relative to the analyzed repository."""
+    if not path:
+        return ""
+    return os.path.relpath(path, os.path.abspath(repo_path)).replace(os.sep, "/")
+
+
+def find_analyzer_dll():
+    """Locate the built analyzer assembly, so it can be started without `dotnet run`."""
+    if ANALYZER_DLL:
+        return ANALYZER_DLL if os.path.exists(ANALYZER_DLL) else None
+
+    assembly_name = os.path.splitext(ANALYZER_PROJECT_FILE)[0] + ".dll"
+    candidates = glob(os.path.join(ANALYZER_DIR, "bin", "**", assembly_name), recursive=True)
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+class AnalyzerDaemon:
+    """Client of a long-lived `serve` analyzer process, which analyzes one solution per request."""
+
+    def __init__(self, dll_path):
+        self.dll_path = dll_path
+        self.process = None
+        self.log_file = None
+        self.request_id = 0
+        self.served_requests = 0
+
+    def start(self):
+        """Start the analyzer process."""
+        print(f"🛰️ Starting analyzer daemon {self.dll_path} ...")
+        self.log_file = open(get_log_path("analyzer", f"daemon-{os.getpid()}"), "a", encoding="utf-8")
+        self.process = subprocess.Popen(
+            ["dotnet", self.dll_path, "serve"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self.log_file,
+            text=True, bufsize=1, **get_process_group_args()
+        )
+        self.served_requests = 0
+
+    def analyze(self, solution_path, output_path):
+        """Send a solution to the analyzer process and return the exit code of its analysis."""
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+        self.request_id += 1
+        request = {"id": self.request_id, "source": os.path.abspath(solution_path), "output": os.path.abspath(output_path)}
+        # A hung analysis is killed together with the process, the next request starts a new one
+        timeout = get_timeout("analyze")
+        timed_out = threading.Event()
+        timer = threading.Timer(timeout, self.kill_on_timeout, [timed_out]) if timeout else None
+        try:
+            if timer:
+                timer.start()
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except OSError as e:
+            if not timed_out.is_set():
+                self.close()
+                raise RuntimeError(f"Analyzer daemon failed: {e}")
+            line = ""
+        finally:
+            if timer:
+                timer.cancel()
+
+        if timed_out.is_set():
+            self.close()
+            raise subprocess.TimeoutExpired(["serve", solution_path], timeout)
+
+        if not line:
+            self.close()
+            raise RuntimeError("Analyzer daemon exited unexpectedly.")
+
+        response = json.loads(line)
+        if response.get("error"):
+            print(f"❌ Analyzer daemon: {response['error']}")
+
+        # Recycle the process from time to time, MSBuild keeps state between workspaces
+        self.served_requests += 1
+        if DAEMON_MAX_REQUESTS and self.served_requests >= DAEMON_MAX_REQUESTS:
+            self.close()
+
+        return response["exitCode"]
+
+    def kill_on_timeout(self, timed_out):
+        """Kill the analyzer process tree of a request that took too long."""
+        timed_out.set()
+        kill_process_tree(self.process)
+
+    def close(self):
+        """Stop the analyzer process."""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            kill_process_tree(self.process)
+        self.process = None
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+
+_analyzer_daemon = None
+
+def get_analyzer_daemon(dll_path):
+    """Return the analyzer daemon of this process, one is kept alive per worker."""
+    global _analyzer_daemon
+    if _analyzer_daemon is None or _analyzer_daemon.dll_path != dll_path:
+        if _analyzer_daemon is not None:
+            _analyzer_daemon.close()
+        _analyzer_daemon = AnalyzerDaemon(dll_path)
+        atexit.register(_analyzer_daemon.close)
+    return _analyzer_daemon
+
+
+@traced("analyze")
+def export_analyzer_results(solution_path, output_path):
+    """Run the analyzer on a solution and export its diagnostics to an XML file."""
+    dll_path = find_analyzer_dll()
+
+    log_key = get_log_key(os.path.dirname(os.path.abspath(solution_path)))
+
+    if dll_path and USE_DAEMON:
+        daemon = get_analyzer_daemon(dll_path)
+        start_time = time.time()
+        try:
+            exit_code = daemon.analyze(solution_path, output_path)
+        except subprocess.TimeoutExpired:
+            record_status(log_key, "analyze", ["serve", solution_path], "timeout", None, time.time() - start_time, None)
+            raise
+        except RuntimeError as e:
+            print(f"⚠️ {e} Running the analyzer directly.")
+        else:
+            status = "ok" if exit_code == 0 else "failed"
+            record_status(log_key, "analyze", ["serve", solution_path], status, exit_code, time.time() - start_time, None)
+            if exit_code != 0:
+                raise subprocess.CalledProcessError(returncode=exit_code, cmd=["serve", solution_path])
+            return
+
+    if dll_path:
+        analyze_command = ["dotnet", dll_path, "analyze", solution_path, "--output", output_path]
+    else:
+        project_path = os.path.join(ANALYZER_DIR, ANALYZER_PROJECT_FILE)
         analyze_command = [
-        "dotnet", "run", "--project", project_path, "analyze", solution_path
+            "dotnet", "run", "--project", project_path, "analyze", solution_path, "--output", output_path
         ]
-    
-        result = subprocess.run(analyze_command, capture_output=True, text=True, check=True)
-        match_bumpy = re.search(r"(\d+)\s+CMA0001", result.stdout)
-        match_fpc = re.search(r"(\d+)\s+CMA0002", result.stdout)
-        match_lcom5 = re.search(r"(\d+)\s+CMA0004", result.stdout)
-        match_lcom4 = re.search(r"(\d+)\s+CMA0003", result.stdout)
-
-        bumpy_score = int(match_bumpy.group(1)) if match_bumpy else 0
-        fpc_score = int(match_fpc.group(1)) if match_fpc else 0
-        lcom5_score = int(match_lcom5.group(1)) if match_lcom5 else 0
-        lcom4_score = int(match_lcom4.group(1)) if match_lcom4 else 0
-
-        if "diagnostics found" not in result.stdout and "diagnostic found" not in result.stdout:
-            raise subprocess.CalledProcessError(returncode=result.returncode, cmd=result.args, output=result.stdout)
-
-        formatted_result = {
-            "bumpy_score": bumpy_score,
-            "fpc_score": fpc_score,
-            "lcom4_score": lcom4_score,
-            "lcom5_score": lcom5_score
-        }
-
-        return formatted_result
-
-        
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error running analyzer: {e}")
-        return None
+
+    run_step("analyze", analyze_command, log_key)
 
 
-def analyze_milestone(milestone_keywords = None):
-    """Analyze all milestone commits using Bumpy Road Analyzer."""
-    print(f"🔍 Fetching commits for milestone: {milestone_keywords}")
-    # try:
-    #      with open("commit_data.json", "r") as file:
-    #         commit_data = json.load(file)
-    # except (FileNotFoundError):
-    #     get_milestone_commits(milestone_keywords)
-    #     with open("commit_data.json", "r") as file:
-    #         commit_data = json.load(file)
-    commit_data = get_milestone_commits(milestone_keywords)
+def collect_metric_values(repo_path):
+    """Run the analyzers once and collect the metric value of every reported diagnostic."""
+    commit_sha = get_commit_sha(repo_path)
+    fingerprint = get_analyzer_fingerprint()
+    cached_result = get_cached_result("metric_values", commit_sha, fingerprint)
+    if cached_result:
+        print(f"♻️ Using cached metric values for commit {commit_sha}")
+        return cached_result
+
+    solution_path = find_solution_file(repo_path)
+    if not solution_path:
+        print("❌ No solution found.")
+        return None
 
+    print(f"🚀 Collecting metric values for {repo_path} ...")
 
-    results = {}
+    build_solution(solution_path)
 
-    for project_id, project_data in commit_data.items():
+    metric_values = {score: [] for score in DIAGNOSTIC_SCORES.values()}
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "analysis_results.xml")
         try:
-            repo_path = clone_repo(project_id)
-            commit_id = project_data.get("last_commit_id")
+            export_analyzer_results(solution_path, output_path)
+        except subprocess.SubprocessError as e:
+            print(f"❌ Error running analyzer: {e}")
+            return None
 
-            if not commit_id or not repo_path:
+        for _, element in ET.iterparse(output_path):
+            if element.tag != "Diagnostic":
                 continue
+            score = DIAGNOSTIC_SCORES.get(element.attrib.get("Id"))
+            metric_value = element.findtext("MetricValue")
+            if score and metric_value is not None:
+                metric_values[score].append(float(metric_value))
+            element.clear()
+
+    store_result("metric_values", commit_sha, metric_values, fingerprint)
+    return metric_values
+
+
+def try_clone_repo(project_id):
+    """Clone a project, logging the error instead of raising it."""
+    try:
+        return clone_repo(project_id)
+    except Exception as e:
+        print(f"❌ Error cloning project {project_id}: {e}")
+        return None
+
 
-            checkout_commit(repo_path, commit_id)
-            analysis_result = run_analyzers(repo_path)
-            builtin_analysis_result  = run_builtin_roslyn_metrics(repo_path)
-
-            if analysis_result:
-                results[project_id] = {
-                    "project_id": project_id,
-                    "commit_id": commit_id,
-                    "bumpy_score": analysis_result["bumpy_score"],
-                    "fpc_score": analysis_result["fpc_score"],
-                    "lcom5_score": analysis_result["lcom5_score"],
-                    "lcom4_score": analysis_result["lcom4_score"],
-                    "MaintainabilityIndex": builtin_analysis_result["MaintainabilityIndex"],
-                    "CyclomaticComplexity": builtin_analysis_result["CyclomaticComplexity"],
-                    "ClassCoupling": builtin_analysis_result["ClassCoupling"],
-                    "DepthOfInheritance": builtin_analysis_result["DepthOfInheritance"],
-                    "SourceLines": builtin_analysis_result["SourceLines"],
-                    "ExecutableLines": builtin_analysis_result["ExecutableLines"],
-                }
+def resolve_milestone_commits(milestone_commit_data):
+    """Fill in the last commit of every project and milestone, walking each cloned history once."""
+    project_dates = {}
+    for commit_data in milestone_commit_data:
+        for project_id, project_data in commit_data.items():
+            if not project_data.get("last_commit_id") and project_data.get("milestone_date"):
+                project_dates.setdefault(project_id, set()).add(project_data["milestone_date"])
+
+    # The whole history is needed to find the commits, so the clones are fetched in parallel first
+    project_ids = list(project_dates)
+    repo_paths = dict(zip(project_ids, clone_all(try_clone_repo, project_ids)))
+
+    for project_id, milestone_dates in project_dates.items():
+        repo_path = repo_paths[project_id]
+        if not repo_path:
+            continue
+        try:
+            last_commits = resolve_commits_before(repo_path, milestone_dates)
         except Exception as e:
-            print(f"❌ Error analyzing project {project_id}: {e}")
+            print(f"❌ Error resolving milestone commits of project {project_id}: {e}")
+            continue
+
+        for commit_data in milestone_commit_data:
+            project_data = commit_data.get(project_id)
+            if project_data and not project_data.get("last_commit_id"):
+                project_data["last_commit_id"] = last_commits.get(project_data.get("milestone_date"))
+
+    return milestone_commit_data
+
+
+def fetch_project_metadata(job):
+    """Pipeline stage: look up the clone URL of a (project_id, project_data) job."""
+    project_id, project_data = job
+    commit_id = project_data.get("last_commit_id")
+    if not commit_id:
+        return None
+
+    repo_url = get_clone_url(project_id)
+    if not repo_url:
+        return None
+    return {"project_id": project_id, "commit_id": commit_id, "repo_url": repo_url}
+
+
+def clone_project(task):
+    """Pipeline stage: clone the project or fetch the milestone commit into the existing clone."""
+    repo_path = ensure_clone(task["repo_url"], os.path.join(CLONE_DIR, str(task["project_id"])), [task["commit_id"]])
+    if not repo_path:
+        return None
+    return {**task, "repo_path": repo_path}
 
 
+def checkout_project(task):
+    """Pipeline stage: check the milestone commit out into its own worktree."""
+    return {**task, "worktree_path": checkout_worktree(task["repo_path"], task["commit_id"])}
+
+
+def ingest_project_result(task):
+    """Pipeline stage: combine the analyzer results and the built-in metrics into the project's result."""
+    analysis_result = task["analysis_result"]
+    # The Metrics target fails on some old commits, the custom analyzer results are kept with null metrics
+    builtin_analysis_result = task["builtin_analysis_result"] or {}
+    if not analysis_result:
+        return None
+
+    return {
+        "project_id": task["project_id"],
+        "commit_id": task["commit_id"],
+        "bumpy_score": analysis_result["bumpy_score"],
+        "fpc_score": analysis_result["fpc_score"],
+        "lcom5_score": analysis_result["lcom5_score"],
+        "lcom4_score": analysis_result["lcom4_score"],
+        "MaintainabilityIndex": builtin_analysis_result.get("MaintainabilityIndex"),
+        "CyclomaticComplexity": builtin_analysis_result.get("CyclomaticComplexity"),
+        "ClassCoupling": builtin_analysis_result.get("ClassCoupling"),
+        "DepthOfInheritance": builtin_analysis_result.get("DepthOfInheritance"),
+        "SourceLines": builtin_analysis_result.get("SourceLines"),
+        "ExecutableLines": builtin_analysis_result.get("ExecutableLines"),
+        "projects": analysis_result.get("projects", {}),
+        "files": analysis_result.get("files", {}),
+    }
+
+
+# Stages of a milestone project: (name, function, runs in a process pool)
+PROJECT_STAGES = [
+    ("metadata", fetch_project_metadata, False),
+    ("clone", clone_project, False),
+    ("checkout", checkout_project, False),
+    ("restore", restore_commit, False),
+    ("build", build_commit, True),
+    ("analyze", analyze_built_commit, True),
+    ("ingest", ingest_project_result, False),
+]
+
+
+def get_project_pipeline():
+    """Pipeline running the stages of different projects at the same time, each with its own concurrency."""
+    return Pipeline(
+        [
+            Stage(name, function, PIPELINE_WORKERS.get(name, DEFAULT_STAGE_WORKERS[name]), processes)
+            for name, function, processes in PROJECT_STAGES
+        ],
+        PIPELINE_QUEUE_SIZE
+    )
+
+
+def analyze_project(project_id, project_data):
+    """Clone, checkout and analyze a single project at its milestone commit."""
+    with span("project", f"{project_id}@{project_data.get('last_commit_id')}"):
+        return run_steps([function for _, function, _ in PROJECT_STAGES], (project_id, project_data))
+
+
+def get_milestone_label(milestone_keywords):
+    """Readable label of a milestone's keyword set in the results store."""
+    if isinstance(milestone_keywords, (list, tuple)):
+        return " / ".join(str(keyword) for keyword in milestone_keywords)
+    return str(milestone_keywords) if milestone_keywords else None
+
+
+def store_milestone_results(results, run_name, milestone_keywords, milestone_index):
+    """Write the results of a milestone run into the results store."""
+    store_rows(
+        make_row(
+            "milestone", run_name, project_id, result, result.get("commit_id"),
+            get_milestone_label(milestone_keywords), milestone_index
+        )
+        for project_id, result in results.items()
+    )
+
+
+def analyze_milestone(milestone_keywords = None, commit_data = None, run_name = "milestone", output_file = None, milestone_index = None):
+    """Analyze all milestone commits using Bumpy Road Analyzer, checkpointing the results into the results store and output_file."""
+    if commit_data is None:
+        print(f"🔍 Fetching commits for milestone: {milestone_keywords}")
+        # try:
+        #      with open("commit_data.json", "r") as file:
+        #         commit_data = json.load(file)
+        # except (FileNotFoundError):
+        #     get_milestone_commits(milestone_keywords)
+        #     with open("commit_data.json", "r") as file:
+        #         commit_data = json.load(file)
+        commit_data = get_milestone_commits(milestone_keywords)
+
+    resolve_milestone_commits([commit_data])
+
+    # One job per project, commit and configuration, a killed run continues with the projects it has not finished
+    fingerprint = get_job_fingerprint()
+    jobs = {
+        make_job_key(str(project_id), project_data.get("last_commit_id"), fingerprint): (project_id, project_data)
+        for project_id, project_data in commit_data.items()
+    }
+    finished = get_results(run_name, set(jobs))
+
+    def collect_results(job_results):
+        # Keep the order of the milestone commit listing regardless of completion order
+        return {project_id: job_results[key] for key, (project_id, _) in jobs.items() if job_results.get(key)}
+
+    def save_checkpoint(key, result):
+        finished[key] = result
+        store_milestone_results({result["project_id"]: result}, run_name, milestone_keywords, milestone_index)
+
+    def write_checkpoint():
+        if output_file and WRITE_JSON:
+            save_json(output_file, collect_results(finished))
+
+    pipeline = None
+    if PIPELINE_ENABLED:
+        pipeline = get_project_pipeline()
+        print(f"⚙️ Analyzing {len(commit_data)} projects in a pipeline of {len(pipeline.stages)} stages...")
+    elif WORKERS > 1:
+        print(f"⚙️ Analyzing {len(commit_data)} projects with {WORKERS} workers...")
+    results = collect_results(run_jobs(run_name, jobs, analyze_project, WORKERS, save_checkpoint, pipeline, write_checkpoint))
+    # Also stores the results finished by an earlier, killed run
+    store_milestone_results(results, run_name, milestone_keywords, milestone_index)
+
+    prune_worktrees()
+
     return results
 
+
+def save_json(path, data):
+    """Write a result file, replacing it atomically so a killed run never leaves it half written."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(temp_path, path)
+
+
 def analyze_all_milestones():
     """Analyze all milestone commits dynamically."""
+    start_run("milestones")
+    build_analyzer()
 
-    ind = 1
-    for milestone in MILESTONES:
-        milestone_results = analyze_milestone(milestone)
+    print(f"🔍 Fetching commits for milestones: {MILESTONES}")
+    milestone_commit_data = resolve_milestone_commits(get_all_milestone_commits(MILESTONES))
 
-        with open(f"analysis_results_{ind}.json", "w") as f:
-            json.dump(milestone_results, f, indent=4)
+    ind = 1
+    for milestone, commit_data in zip(MILESTONES, milestone_commit_data):
+        output_file = f"analysis_results_{ind}.json"
+        milestone_results = analyze_milestone(milestone, commit_data, f"milestone_{ind}", output_file, ind)
+        if WRITE_JSON:
+            save_json(output_file, milestone_results)
         ind = ind + 1
 
-    print("✅ Bumpy Road Analysis complete! Results saved to files.")
+    print("✅ Bumpy Road Analysis complete! Results saved to the results store and files.")
+    finish_run()
 
+@traced("find_solution")
 def find_solution_file(repo_path):
-    """Recursively searches for a .sln file in the given repository directory."""
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file.endswith(".sln") or file.endswith(".slnx"):
-                return os.path.join(root, file)
-            
-    # Check if it's a Unity project
-    unity_project_settings = os.path.join(repo_path, "ProjectSettings", "ProjectVersion.txt")
-    if os.path.exists(unity_project_settings):
-        if (not UNITY_PATH):
-            print("🎮 Detected Unity project. Unity is not configured, skipping...")
-            return None
+    """Find the solution of a checkout: the root-most one, with the most projects on a tie.
+
+    The choice is remembered per git tree, commits with the same files never search again.
+    """
+    tree_hash = get_tree_hash(repo_path)
+    relative_path = _solution_paths.get(tree_hash) or get_cached_result("solution", tree_hash)
+    if relative_path and os.path.exists(os.path.join(repo_path, relative_path)):
+        return os.path.join(repo_path, relative_path)
+
+    solutions = discover_solutions(repo_path)
+    relative_path = solutions[0] if solutions else find_unity_solution(repo_path)
+    if not relative_path:
+        return None  # No solution file found
+
+    if tree_hash:
+        _solution_paths[tree_hash] = relative_path
+        store_result("solution", tree_hash, relative_path)
+    return os.path.join(repo_path, relative_path)
+
+def find_unity_solution(repo_path):
+    """Generate the solution of a Unity project, returns its path relative to the project.
+
+    Unity only starts for a project layout it has not generated before, otherwise the cached projects are reused.
+    """
+    if not is_unity_project(repo_path):
+        return None
+
+    files = list_unity_files(repo_path)
+    if UNITY_GENERATOR == "asmdef":
+        print("🎮 Detected Unity project. Generating solution file from the assembly definitions...")
+        return generate_asmdef_solution(repo_path, files)
+
+    if (not UNITY_PATH):
+        print("🎮 Detected Unity project. Unity is not configured, skipping...")
+        return None
+
+    cache_key = get_unity_cache_key(repo_path, files)
+    if restore_unity_solution(repo_path, cache_key):
+        print("🎮 Detected Unity project. Reusing the solution generated for the same layout.")
+    else:
         print("🎮 Detected Unity project. Generating solution file...")
         generate_unity_solution(repo_path)
-        
-        # Search again for the generated solution
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if file.endswith(".sln"):
-                    return os.path.join(root, file)
-    
-    return None  # No solution file found
+        store_unity_solution(repo_path, cache_key)
+
+    # Unity writes the solution into the project root
+    solutions = [file for file in os.listdir(repo_path) if file.endswith(".sln")]
+    solutions = rank_solutions(repo_path, solutions)
+    return solutions[0] if solutions else None
 
 def generate_unity_solution(repo_path):
     """Uses Unity to generate a Visual Studio solution."""
@@ -321,9 +835,9 @@ def generate_unity_solution(repo_path):
         UNITY_PATH, "-batchmode", "-quit", "-nographics", "-projectPath", repo_path, "-executeMethod", "UnityEditor.SyncVS.SyncSolution"
     ]
     try:
-        subprocess.run(command, check=True)
+        run_step("unity", command, get_log_key(repo_path))
         print("✅ Unity solution file generated.")
-    except subprocess.CalledProcessError as e:
+    except subprocess.SubprocessError as e:
         print(f"❌ Error generating Unity solution: {e}")
 
 def update_unity_project_version(project_path):
@@ -0,0 +1,460 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+import threading
+import subprocess
+import yaml
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = "benchmark_results"
+
+# Synthetic repositories per scale: student repositories, projects per solution, classes per project,
+# methods per class and commits of the history
+SCALES = {
+    "small": {"repos": 2, "projects": 2, "classes": 10, "methods": 4, "commits": 20},
+    "medium": {"repos": 5, "projects": 4, "classes": 40, "methods": 6, "commits": 100},
+    "large": {"repos": 10, "projects": 8, "classes": 120, "methods": 8, "commits": 300},
+}
+GROUP_ID = "benchmark"
+HISTORY_START = datetime.datetime(2024, 9, 1, tzinfo=datetime.timezone.utc)
+COMMIT_INTERVAL = datetime.timedelta(hours=6)
+MILESTONE_TITLES = ["Prototype 1", "Prototype 2", "Finished"]  # Matched by the keywords of config.example.yml
+CSHARP_PROJECT_TYPE = "{9A19103F-16F7-4668-BE54-9A1E7A4F7556}"
+
+
+# === Synthetic repositories ===
+
+def generate_method(rng, index):
+    """A C# method with nested branches and loops, so every analyzer has something to report."""
+    parameters = [f"p{i}" for i in range(rng.randint(1, 6))]
+    lines = [f"        public int Method{index}({', '.join(f'int {p}' for p in parameters)})", "        {", "            var result = 0;"]
+    for block in range(rng.randint(1, 4)):
+        first, second = rng.choice(parameters), rng.choice(parameters)
+        lines += [
+            f"            if ({first} > {second} + {block})",
+            "            {",
+            f"                for (var i = 0; i < {first}; i++)",
+            "                {",
+            f"                    if (i % {block + 2} == 0) result += i * _state{block % 2};",
+            "                }",
+            "            }",
+        ]
+    lines += ["            return result;", "        }"]
+    return lines
+
+
+def generate_class(project_name, class_index, revision, methods):
+    """Source of one class, the revision changes its code the way a commit would."""
+    rng = random.Random(f"{project_name}/{class_index}/{revision}")
+    lines = [
+        f"namespace {project_name}",
+        "{",
+        f"    public class Class{class_index}",
+        "    {",
+        "        private int _state0;",
+        "        private int _state1;",
+        "",
+    ]
+    for method_index in range(methods + revision % 3):
+        lines += generate_method(rng, method_index) + [""]
+    lines += ["    }", "}", ""]
+    return "\n".join(lines)
+
+
+def generate_project_file():
+    """SDK style project file of a synthetic class library."""
+    return (
+        '<Project Sdk="Microsoft.NET.Sdk">\n'
+        "  <PropertyGroup>\n"
+        "    <TargetFramework>net8.0</TargetFramework>\n"
+        "  </PropertyGroup>\n"
+        "</Project>\n"
+    )
+
+
+def generate_solution(project_names):
+    """Visual Studio solution listing the synthetic projects."""
+    lines = ["", "Microsoft Visual Studio Solution File, Format Version 12.00", "# Visual Studio Version 17"]
+    for index, project_name in enumerate(project_names):
+        project_guid = f"{{00000000-0000-0000-0000-{index + 1:012d}}}"
+        lines += [
+            f'Project("{CSHARP_PROJECT_TYPE}") = "{project_name}", "{project_name}\\{project_name}.csproj", "{project_guid}"',
+            "EndProject",
+        ]
+    lines += ["Global", "EndGlobal", ""]
+    return "\r\n".join(lines)
+
+
+def get_commit_time(index):
+    """Commit date of the index-th commit of every synthetic history."""
+    return HISTORY_START + index * COMMIT_INTERVAL
+
+
+def get_milestones(spec):
+    """Milestones splitting the history into thirds, due the day after their last commit."""
+    milestones = []
+    for index, title in enumerate(MILESTONE_TITLES):
+        last_commit = (index + 1) * spec["commits"] // len(MILESTONE_TITLES) - 1
+        due_date = (get_commit_time(last_commit) + datetime.timedelta(days=1)).date()
+        milestones.append({"id": index + 1, "title": title, "due_date": due_date.isoformat()})
+    return milestones
+
+
+def write_blob(stream, path, content):
+    """Add a file to the current commit of a fast-import stream."""
+    data = content.encode("utf-8")
+    stream.write(f"M 100644 inline {path}\ndata {len(data)}\n".encode("utf-8") + data + b"\n")
+
+
+def create_synthetic_repo(repo_path, name, spec):
+    """Create a bare repository with a synthetic solution and a history of spec["commits"] commits.
+
+    The history is written with git fast-import, which is orders of magnitude faster than one
+    `git commit` per revision. The first commit adds every file, each following commit changes one class.
+    """
+    subprocess.run(["git", "init", "--quiet", "--bare", repo_path], check=True)
+    subprocess.run(["git", "-C", repo_path, "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+    # Serve partial clones like GitLab does
+    subprocess.run(["git", "-C", repo_path, "config", "uploadpack.allowFilter", "true"], check=True)
+
+    project_names = [f"{name}_Project{index + 1}" for index in range(spec["projects"])]
+    rng = random.Random(name)
+    process = subprocess.Popen(["git", "-C", repo_path, "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    stream = process.stdin
+
+    for commit_index in range(spec["commits"]):
+        message = f"Commit {commit_index + 1}".encode("utf-8")
+        timestamp = int(get_commit_time(commit_index).timestamp())
+        stream.write(
+            f"commit refs/heads/main\ncommitter Benchmark <benchmark@example.com> {timestamp} +0000\n"
+            f"data {len(message)}\n".encode("utf-8") + message + b"\n"
+        )
+
+        if commit_index == 0:
+            write_blob(stream, f"{name}.sln", generate_solution(project_names))
+            for project_name in project_names:
+                write_blob(stream, f"{project_name}/{project_name}.csproj", generate_project_file())
+                for class_index in range(spec["classes"]):
+                    write_blob(
+                        stream, f"{project_name}/Class{class_index}.cs",
+                        generate_class(project_name, class_index, 0, spec["methods"])
+                    )
+        else:
+            project_name = rng.choice(project_names)
+            class_index = rng.randrange(spec["classes"])
+            write_blob(
+                stream, f"{project_name}/Class{class_index}.cs",
+                generate_class(project_name, class_index, commit_index, spec["methods"])
+            )
+        stream.write(b"\n")
+
+    stream.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"git fast-import failed for {repo_path}")
+
+
+def write_metrics_reports(solution_path, spec):
+    """Write <Project>.Metrics.xml reports shaped like the ones of the Metrics target, for runs without dotnet."""
+    from solution_parser import get_solution_projects
+
+    def metrics(rng):
+        values = {
+            "MaintainabilityIndex": rng.randint(40, 100),
+            "CyclomaticComplexity": rng.randint(1, 400),
+            "ClassCoupling": rng.randint(0, 60),
+            "DepthOfInheritance": rng.randint(1, 4),
+            "SourceLines": rng.randint(10, 4000),
+            "ExecutableLines": rng.randint(5, 1500),
+        }
+        return "<Metrics>" + "".join(f'<Metric Name="{name}" Value="{value}" />' for name, value in values.items()) + "</Metrics>"
+
+    for project_path in get_solution_projects(solution_path):
+        project_name = os.path.splitext(os.path.basename(project_path))[0]
+        rng = random.Random(project_name)
+        types = []
+        for class_index in range(spec["classes"]):
+            members = "".join(
+                f'<Method Name="int Class{class_index}.Method{method_index}()">{metrics(rng)}</Method>'
+                for method_index in range(spec["methods"])
+            )
+            types.append(f'<NamedType Name="Class{class_index}">{metrics(rng)}<Members>{members}</Members></NamedType>')
+        report = (
+            f'<?xml version="1.0" encoding="utf-8"?><CodeMetricsReport Version="1.0"><Targets>'
+            f'<Target Name="{project_name}.csproj"><Assembly Name="{project_name}, Version=1.0.0.0">{metrics(rng)}'
+            f'<Namespaces><Namespace Name="{project_name}">{metrics(rng)}<Types>{"".join(types)}</Types></Namespace>'
+            f"</Namespaces></Assembly></Target></Targets></CodeMetricsReport>"
+        )
+        with open(os.path.join(os.path.dirname(project_path), f"{project_name}.Metrics.xml"), "w", encoding="utf-8") as f:
+            f.write(report)
+
+
+# === Stub GitLab ===
+
+class StubGitLabHandler(BaseHTTPRequestHandler):
+    """Answers the GitLab API endpoints used by milestone_commit_finder and analyzer.get_project_info."""
+
+    def do_GET(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if parts[:2] == ["api", "v4"]:
+            parts = parts[2:]
+
+        projects = self.server.projects
+        if len(parts) == 3 and parts[0] == "groups" and parts[2] == "subgroups":
+            self.send_json([])
+        elif len(parts) == 3 and parts[0] == "groups" and parts[2] == "projects":
+            self.send_json([{"id": int(project_id)} for project_id in projects])
+        elif len(parts) == 3 and parts[0] == "projects" and parts[2] == "milestones" and parts[1] in projects:
+            self.send_json(projects[parts[1]]["milestones"])
+        elif len(parts) == 2 and parts[0] == "projects" and parts[1] in projects:
+            self.send_json({"id": parts[1], "http_url_to_repo": projects[parts[1]]["url"]})
+        else:
+            self.send_json({"message": "404 Not Found"}, 404)
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_gitlab():
+    """Serve the stub GitLab API on a free local port, the projects are set per scale."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitLabHandler)
+    server.projects = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# === Benchmark ===
+
+def write_benchmark_config(work_dir, api_url, user_config_path):
+    """Write the config.yml of the benchmark: the example configuration with the user's analyzer settings.
+
+    Result caches are disabled, so every scale measures the full work.
+    """
+    with open(os.path.join(SCRIPT_DIR, "config.example.yml"), "r", encoding="utf-8") as f:
+        benchmark_config = yaml.safe_load(f)
+
+    if os.path.exists(user_config_path):
+        with open(user_config_path, "r", encoding="utf-8") as f:
+            user_config = yaml.safe_load(f) or {}
+        for section in ("analyzer", "process"):
+            benchmark_config[section].update(user_config.get(section, {}))
+
+    analyzer_config = benchmark_config["analyzer"]
+    for key in ("solution_dir", "project_dir"):
+        analyzer_config[key] = os.path.abspath(os.path.join(SCRIPT_DIR, analyzer_config[key]))
+
+    benchmark_config["gitlab"].update({
+        "url": api_url, "token": "benchmark", "group_id": GROUP_ID, "subgroup_id": "", "cache": {"enabled": False},
+    })
+    benchmark_config["project"].update({"clone_dir": "./repos", "worktree_dir": "./worktrees", "worktree_max_count": 0})
+    benchmark_config["cache"] = {"enabled": False}
+    benchmark_config["pipeline"] = {"enabled": False}
+    benchmark_config["process"]["log_dir"] = "./logs"
+
+    with open(os.path.join(work_dir, "config.yml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(benchmark_config, f, allow_unicode=True, sort_keys=False)
+
+
+def get_version():
+    """Commit of the benchmarked code, marked dirty when it has uncommitted changes."""
+    try:
+        sha = subprocess.run(
+            ["git", "-C", SCRIPT_DIR, "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "-C", SCRIPT_DIR, "status", "--porcelain", "--untracked-files=no"],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def get_peak_memory():
+    """Peak RSS in MB of this process and of its largest finished child process."""
+    if resource is None:
+        return None, None
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is in bytes on macOS, KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return round(own, 1), round(children, 1)
+
+
+@contextmanager
+def timed(timings, name):
+    """Add the wall time of a block to timings[name]."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start_time
+
+
+def run_scale(server, scale_name, spec, scale_index, use_dotnet):
+    """Generate the repositories of a scale, serve them through the stub and time every stage on them."""
+    # The modules read config.yml from the working directory when they are imported
+    from analyzer import (
+        MILESTONES, try_clone_repo, resolve_milestone_commits, find_solution_file, build_solution, run_analyzers,
+        run_builtin_roslyn_metrics, aggregate_project_builtin_metrics
+    )
+    from clone_manager import clone_all
+    from metrics_ingestion import find_metrics_files
+    from milestone_commit_finder import get_all_milestone_commits
+    from worktree_manager import checkout_worktree
+
+    # Project ids differ per scale, so the clones of one scale are never reused by another
+    projects = {}
+    generation_start = time.perf_counter()
+    for repo_index in range(spec["repos"]):
+        project_id = str((scale_index + 1) * 1000 + repo_index + 1)
+        repo_path = os.path.abspath(os.path.join("remotes", scale_name, f"{project_id}.git"))
+        create_synthetic_repo(repo_path, f"Repo{project_id}", spec)
+        projects[project_id] = {"url": f"file://{repo_path}", "milestones": get_milestones(spec)}
+    generation_time = time.perf_counter() - generation_start
+    server.projects = projects
+
+    timings = {}
+    with timed(timings, "milestones"):
+        milestone_commit_data = get_all_milestone_commits(MILESTONES)
+    with timed(timings, "clone"):
+        clone_all(try_clone_repo, list(projects))
+    with timed(timings, "resolve_commits"):
+        resolve_milestone_commits(milestone_commit_data)
+
+    targets = sorted({
+        (project_id, project_data["last_commit_id"])
+        for commit_data in milestone_commit_data
+        for project_id, project_data in commit_data.items()
+        if project_data.get("last_commit_id")
+    })
+
+    for project_id, commit_id in targets:
+        repo_path = os.path.abspath(os.path.join("repos", str(project_id)))
+        with timed(timings, "checkout"):
+            worktree_path = checkout_worktree(repo_path, commit_id)
+        with timed(timings, "find_solution"):
+            solution_path = find_solution_file(worktree_path)
+        if not solution_path:
+            continue
+
+        if use_dotnet:
+            with timed(timings, "build"):
+                build_solution(solution_path)
+            with timed(timings, "run_analyzers"):
+                run_analyzers(worktree_path, solution_path)
+            with timed(timings, "run_builtin_roslyn_metrics"):
+                run_builtin_roslyn_metrics(worktree_path, solution_path)
+        else:
+            write_metrics_reports(solution_path, spec)
+
+        with timed(timings, "aggregate_metrics"):
+            aggregate_project_builtin_metrics(find_metrics_files(solution_path))
+
+    total_time = sum(timings.values())
+    peak_rss_mb, peak_child_rss_mb = get_peak_memory()
+    return {
+        "spec": spec,
+        "repos": len(projects),
+        "commits": len(targets),
+        "generation_seconds": round(generation_time, 3),
+        "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+        "total_seconds": round(total_time, 3),
+        "commits_per_hour": round(len(targets) / total_time * 3600, 1) if total_time else None,
+        "peak_rss_mb": peak_rss_mb,
+        "peak_child_rss_mb": peak_child_rss_mb,
+    }
+
+
+def print_report(report, baseline=None):
+    """Print the timings of every scale, with the change against a baseline report if given."""
+    print(f"📊 Benchmark of {report['version']} (dotnet: {'yes' if report['dotnet'] else 'no, analyzers skipped'})")
+    for scale_name, scale in report["scales"].items():
+        base_scale = (baseline or {}).get("scales", {}).get(scale_name, {})
+        print(
+            f"  {scale_name}: {scale['repos']} repos, {scale['commits']} commits, {scale['total_seconds']:.1f}s, "
+            f"{scale['commits_per_hour']} commits/hour, peak RSS {scale['peak_rss_mb']} MB "
+            f"(children {scale['peak_child_rss_mb']} MB)"
+        )
+        for name, seconds in scale["timings"].items():
+            line = f"    {name:<28} {seconds:>10.3f}s"
+            base_seconds = base_scale.get("timings", {}).get(name)
+            if base_seconds:
+                line += f"  {(seconds - base_seconds) / base_seconds:+.0%} vs {baseline['version']}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the analysis stages on synthetic repositories behind a stub GitLab.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--no-dotnet", action="store_true", help="skip build and analyzers even if dotnet is installed")
+    parser.add_argument("--compare", help="earlier benchmark report to compare against")
+    parser.add_argument("--work-dir", help="keep the generated repositories and clones in this directory")
+    args = parser.parse_args()
+
+    original_dir = os.getcwd()
+    results_dir = os.path.abspath(RESULTS_DIR)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix="benchmark-")
+    os.makedirs(work_dir, exist_ok=True)
+    server = start_stub_gitlab()
+    write_benchmark_config(work_dir, f"http://127.0.0.1:{server.server_address[1]}/api/v4", os.path.abspath("config.yml"))
+
+    use_dotnet = not args.no_dotnet and shutil.which("dotnet") is not None
+    report = {
+        "version": get_version(),
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "dotnet": use_dotnet,
+        "scales": {},
+    }
+
+    os.chdir(work_dir)
+    sys.path.insert(0, SCRIPT_DIR)
+    try:
+        if use_dotnet:
+            from analyzer import build_analyzer
+            build_analyzer()
+        for scale_index, scale_name in enumerate(args.scales):
+            print(f"⏱️ Benchmarking the {scale_name} scale...")
+            report["scales"][scale_name] = run_scale(server, scale_name, SCALES[scale_name], scale_index, use_dotnet)
+    finally:
+        os.chdir(original_dir)
+        server.shutdown()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(results_dir, exist_ok=True)
+    report_path = os.path.join(results_dir, f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}-{report['version']}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print_report(report, baseline)
+    print(f"✅ Benchmark report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
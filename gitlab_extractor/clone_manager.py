@@ -0,0 +1,145 @@
+import os
+import subprocess
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from profiler import span, count
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+CLONE_CONFIG = config.get("clone", {})
+CLONE_FILTER = CLONE_CONFIG.get("filter", "blob:none")  # Partial clone filter, "" = full clone
+SHALLOW = CLONE_CONFIG.get("shallow", False)  # Fetch only the requested refs with depth 1 when they are known
+FETCH_EXISTING = CLONE_CONFIG.get("fetch_existing", True)  # Update existing clones incrementally
+MAX_CONCURRENCY = CLONE_CONFIG.get("max_concurrency", 4)  # Number of repositories cloned or fetched at the same time
+
+
+def run_git(args, cwd=None, env=None):
+    """Run a git command, raises CalledProcessError with git's output on failure."""
+    env = {**os.environ, **env} if env else None
+    return subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def has_commit(repo_path, rev):
+    """Check whether a revision (SHA, tag or branch) is available in the local clone."""
+    try:
+        # Partial clones would otherwise download a missing commit just to answer the question
+        run_git(["rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"], cwd=repo_path, env={"GIT_NO_LAZY_FETCH": "1"})
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def get_filter_args():
+    """Build the partial clone arguments of clone and fetch."""
+    return [f"--filter={CLONE_FILTER}"] if CLONE_FILTER else []
+
+
+def get_refspec(ref):
+    """Map a requested ref to a fetch refspec, tags are kept under their own name."""
+    if ref.startswith("refs/"):
+        return f"+{ref}:{ref}"
+    if all(c in "0123456789abcdef" for c in ref.lower()) and len(ref) == 40:
+        return ref
+    return f"+refs/tags/{ref}:refs/tags/{ref}"
+
+
+def clone(repo_url, repo_path, refs=None):
+    """Create a new clone, a shallow one holding only the given refs when shallow cloning is enabled."""
+    os.makedirs(os.path.dirname(os.path.abspath(repo_path)), exist_ok=True)
+
+    if SHALLOW and refs:
+        run_git(["init", "--quiet", repo_path])
+        run_git(["remote", "add", "origin", repo_url], cwd=repo_path)
+        fetch_refs(repo_path, refs)
+        return
+
+    run_git(["clone", "--quiet", *get_filter_args(), repo_url, repo_path])
+
+
+def fetch_refs(repo_path, refs):
+    """Fetch just the given refs of a shallow clone."""
+    run_git(
+        ["fetch", "--quiet", "--depth=1", *get_filter_args(), "origin", *[get_refspec(ref) for ref in refs]],
+        cwd=repo_path
+    )
+
+
+def fetch(repo_path):
+    """Fetch new commits and tags, then fast-forward the checked out branch like a pull would."""
+    run_git(["fetch", "--quiet", "--prune", "--tags", "origin"], cwd=repo_path)
+
+    try:
+        run_git(["symbolic-ref", "--quiet", "HEAD"], cwd=repo_path)
+    except subprocess.CalledProcessError:
+        return  # Detached HEAD, e.g. after checkout_commit
+
+    try:
+        run_git(["merge", "--quiet", "--ff-only", "@{upstream}"], cwd=repo_path)
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️ Could not fast-forward {repo_path}: {e.stderr.strip()}")
+
+
+def get_object_size(repo_path):
+    """Size of the object database of a clone in bytes, 0 if it does not exist yet."""
+    if not os.path.exists(repo_path):
+        return 0
+    try:
+        output = run_git(["count-objects", "-v"], cwd=repo_path)
+    except subprocess.CalledProcessError:
+        return 0
+
+    sizes = dict(line.split(": ", 1) for line in output.splitlines() if ": " in line)
+    return (int(sizes.get("size", 0)) + int(sizes.get("size-pack", 0))) * 1024
+
+
+def sync_clone(repo_url, repo_path, refs):
+    """Clone a repository or fetch the refs missing from an existing clone."""
+    refs = [ref for ref in (refs or []) if ref]
+
+    if not os.path.exists(repo_path):
+        print(f"🔄 Cloning repository into {repo_path} ...")
+        clone(repo_url, repo_path, refs)
+        return repo_path
+
+    missing_refs = [ref for ref in refs if not has_commit(repo_path, ref)]
+    if refs and not missing_refs:
+        print(f"✅ Repository {repo_path} already contains the requested commits.")
+        return repo_path
+
+    if os.path.exists(os.path.join(repo_path, ".git", "shallow")) and missing_refs:
+        print(f"🔄 Fetching {len(missing_refs)} refs into {repo_path} ...")
+        fetch_refs(repo_path, missing_refs)
+    elif FETCH_EXISTING or missing_refs:
+        print(f"🔄 Fetching updates of {repo_path} ...")
+        fetch(repo_path)
+    else:
+        print(f"✅ Repository {repo_path} already exists.")
+
+    return repo_path
+
+
+def ensure_clone(repo_url, repo_path, refs=None):
+    """Clone a repository or bring an existing clone up to date.
+
+    When the needed refs are known and already present nothing is fetched at all, otherwise existing
+    clones are updated incrementally instead of being cloned again.
+    """
+    with span("git_fetch", os.path.basename(os.path.normpath(repo_path))):
+        object_size = get_object_size(repo_path)
+        repo_path = sync_clone(repo_url, repo_path, refs)
+        # The growth of the object database approximates the transferred bytes, packs are stored as received
+        count("bytes", max(0, get_object_size(repo_path) - object_size))
+        return repo_path
+
+
+def clone_all(function, items):
+    """Clone or fetch many repositories in parallel, keeping the order of the items."""
+    items = list(items)
+    if len(items) <= 1 or MAX_CONCURRENCY <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        return list(executor.map(function, items))
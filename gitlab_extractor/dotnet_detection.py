@@ -0,0 +1,102 @@
+import subprocess
+
+# Target framework monikers of .NET Core and of the unified .NET 5+
+DOTNET_CORE_FRAMEWORKS = ("netcoreapp", "net5.0", "net6.0", "net7.0", "net8.0", "net9.0")
+
+# blob SHA -> whether the .csproj targets .NET Core, a blob never changes so this never goes stale
+_csproj_results = {}
+
+
+def is_dotnet_core_csproj(contents):
+    """Check whether the contents of a .csproj file target .NET Core."""
+    contents = contents.lower()
+    return any(framework in contents for framework in DOTNET_CORE_FRAMEWORKS)
+
+
+def list_csproj_blobs(repo_path, commit_sha):
+    """List the blob SHAs of every .csproj file in a commit without reading the tree into Python objects."""
+    output = subprocess.run(
+        ["git", "-C", repo_path, "ls-tree", "-r", "-z", "--full-tree", commit_sha],
+        check=True, capture_output=True, text=True
+    ).stdout
+
+    blobs = []
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        _, object_type, blob_sha = info.split()
+        if object_type == "blob" and path.endswith(".csproj"):
+            blobs.append(blob_sha)
+    return blobs
+
+
+def read_blobs(repo_path, blob_shas):
+    """Read many blobs with a single git cat-file process."""
+    contents = {}
+    if not blob_shas:
+        return contents
+
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "cat-file", "--batch"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        # One request at a time, so neither pipe can fill up while the other side waits
+        for blob_sha in blob_shas:
+            process.stdin.write(f"{blob_sha}\n".encode())
+            process.stdin.flush()
+            header = process.stdout.readline().decode().split()
+            if len(header) < 3 or header[1] == "missing":
+                continue
+            contents[blob_sha] = process.stdout.read(int(header[2])).decode(errors="ignore")
+            process.stdout.read(1)  # Trailing newline after every object
+    finally:
+        process.stdin.close()
+        process.stdout.close()
+        process.wait()
+
+    return contents
+
+
+def is_dotnet_core_commit(repo_path, commit_sha):
+    """Check if a commit uses .NET Core in any .csproj file, reading only blobs not seen before."""
+    blob_shas = list_csproj_blobs(repo_path, commit_sha)
+    if any(_csproj_results.get(blob_sha) for blob_sha in blob_shas):
+        return True
+
+    unknown_shas = [blob_sha for blob_sha in blob_shas if blob_sha not in _csproj_results]
+    for blob_sha, contents in read_blobs(repo_path, unknown_shas).items():
+        _csproj_results[blob_sha] = is_dotnet_core_csproj(contents)
+
+    return any(_csproj_results.get(blob_sha) for blob_sha in unknown_shas)
+
+
+def list_csproj_commits(repo_path, ref="HEAD"):
+    """List the commits that change a .csproj file, oldest first."""
+    output = subprocess.run(
+        ["git", "-C", repo_path, "rev-list", "--reverse", ref, "--", "*.csproj"],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return output.split()
+
+
+def find_first_dotnet_core_commit(repo_path, ref="HEAD"):
+    """Binary search the history for the first commit that uses .NET Core.
+
+    Only commits changing a .csproj can switch the target framework, so the search runs over those.
+    A project is assumed to stay on .NET Core once it has moved there.
+    """
+    candidates = list_csproj_commits(repo_path, ref)
+    if not candidates or not is_dotnet_core_commit(repo_path, candidates[-1]):
+        return None
+
+    low, high = 0, len(candidates) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if is_dotnet_core_commit(repo_path, candidates[middle]):
+            high = middle
+        else:
+            low = middle + 1
+
+    return candidates[low]
@@ -0,0 +1,109 @@
+import datetime
+import subprocess
+import git
+
+
+def get_default_ref(repo_path):
+    """Return the remote default branch of a clone, or HEAD if it has no remote."""
+    repo = git.Repo(repo_path)
+    try:
+        repo.git.rev_parse("--verify", "--quiet", "origin/HEAD")
+        return "origin/HEAD"
+    except git.GitCommandError:
+        return "HEAD"
+
+
+def get_milestone_timestamp(milestone_date):
+    """Convert a YYYY-MM-DD due date into the `until` timestamp used by the commits API."""
+    milestone_datetime = datetime.datetime.strptime(milestone_date, "%Y-%m-%d")
+    return milestone_datetime.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def resolve_commits_before(repo_path, milestone_dates, ref=None):
+    """Find the last commit at or before each milestone date with a single walk of the history."""
+    ref = ref or get_default_ref(repo_path)
+
+    # Unresolved dates are always the earliest ones, so they can be popped from the end
+    pending = sorted((get_milestone_timestamp(milestone_date), milestone_date) for milestone_date in set(milestone_dates))
+    results = {milestone_date: None for _, milestone_date in pending}
+
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "log", "--format=%H %ct", ref],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        # Same order as the commits API: the first listed commit not after the date wins
+        for line in process.stdout:
+            commit_sha, commit_time = line.split()
+            while pending and pending[-1][0] >= int(commit_time):
+                results[pending.pop()[1]] = commit_sha
+            if not pending:
+                break
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+    return results
+
+
+def iter_rev_list(repo_path, ref="HEAD"):
+    """Stream the commit SHAs reachable from a ref, newest first, without holding them in memory."""
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "rev-list", ref],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        for line in process.stdout:
+            yield line.strip()
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def get_commit_position(repo_path, commit_sha, ref="HEAD"):
+    """Return the position of a commit in the rev-list of a ref (0 = newest), or None if it is not listed."""
+    for position, listed_sha in enumerate(iter_rev_list(repo_path, ref)):
+        if listed_sha == commit_sha:
+            return position
+    return None
+
+
+def get_commits_at(repo_path, positions, ref="HEAD"):
+    """Pick the commits at the given rev-list positions in one pass that stops after the last one."""
+    wanted = set(positions)
+    if not wanted:
+        return {}
+
+    last_position = max(wanted)
+    commits = {}
+    for position, commit_sha in enumerate(iter_rev_list(repo_path, ref)):
+        if position in wanted:
+            commits[position] = commit_sha
+        if position >= last_position:
+            break
+    return commits
+
+
+def list_tags_by_date(repo_path):
+    """List (tag name, commit SHA) pairs ordered by commit date, reading every tag with one for-each-ref call."""
+    output = subprocess.run(
+        ["git", "-C", repo_path, "for-each-ref", "refs/tags",
+         "--format=%(refname:short)%00%(objecttype)%00%(objectname)%00%(committerdate:unix)"
+         "%00%(*objecttype)%00%(*objectname)%00%(*committerdate:unix)"],
+        check=True, capture_output=True, text=True
+    ).stdout
+
+    tags = []
+    for line in output.splitlines():
+        name, object_type, object_sha, commit_time, peeled_type, peeled_sha, peeled_time = line.split("\0")
+        # Annotated tags point to a tag object, the commit and its date are on the peeled object
+        if peeled_type == "commit":
+            tags.append((int(peeled_time), name, peeled_sha))
+        elif object_type == "commit":
+            tags.append((int(commit_time), name, object_sha))
+
+    # Stable sort keeps the name order of tags with the same date
+    tags.sort(key=lambda tag: tag[0])
+    return [(name, commit_sha) for _, name, commit_sha in tags]
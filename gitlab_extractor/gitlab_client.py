@@ -0,0 +1,172 @@
+import time
+import threading
+import requests
+import yaml
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from http_cache import HttpCache, get_conditional_headers, to_response, make_offline_miss_response
+from profiler import span, count
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+GITLAB_URL = config["gitlab"]["url"]
+TOKEN = config["gitlab"]["token"]
+MAX_CONCURRENCY = config["gitlab"].get("max_concurrency", 8)  # Parallel API requests
+MAX_RETRIES = config["gitlab"].get("max_retries", 5)  # Retries of rate limited or failed requests
+PER_PAGE = 100  # Maximum page size allowed by the GitLab API
+
+CACHE_CONFIG = config["gitlab"].get("cache", {})
+CACHE_ENABLED = CACHE_CONFIG.get("enabled", True)
+CACHE_DIR = CACHE_CONFIG.get("path", "./cache/http")
+CACHE_TTL = CACHE_CONFIG.get("ttl_seconds", 3600)  # Responses younger than this are not revalidated
+OFFLINE = CACHE_CONFIG.get("offline", False)  # Serve responses only from the cache
+
+
+class GitLabClient:
+    """Pooled GitLab API client that follows pagination and backs off when rate limited."""
+
+    def __init__(self, base_url, token, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES, cache=None, offline=False):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.offline = offline
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        self.session.headers.update({"PRIVATE-TOKEN": token})
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_url(self, path):
+        """Resolve an API path, absolute URLs (e.g. pagination links) are kept as they are."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, path, params=None):
+        """GET an API path through the response cache, retrying rate limited and failed requests."""
+        with span("gitlab_api"):
+            return self.get_cached(path, params)
+
+    def get_cached(self, path, params=None):
+        """Serve a GET from the response cache, revalidating or fetching it when needed."""
+        url = requests.Request("GET", self.get_url(path), params=params).prepare().url
+        if self.cache is None:
+            return self.send(url)
+
+        entry = self.cache.load(url)
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            count("cache_hits")
+            return to_response(entry)
+        if self.offline:
+            print(f"⚠️ {url} is not cached, skipping it in offline mode.")
+            return make_offline_miss_response(url)
+
+        response = self.send(url, get_conditional_headers(entry) if entry else None)
+        if response.status_code == 304 and entry:
+            count("cache_hits")
+            return to_response(self.cache.refresh(url, entry, response))
+        count("cache_misses")
+        if response.status_code == 200:
+            self.cache.save(url, response)
+        return response
+
+    def send(self, url, headers=None):
+        """Send a GET request, retrying rate limited and failed requests."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.semaphore:
+                    response = self.session.get(url, headers=headers, timeout=60)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = get_backoff_delay(attempt)
+                print(f"⚠️ Request to {url} failed ({e}), retrying in {delay:.0f}s...")
+                time.sleep(delay)
+                continue
+
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < self.max_retries:
+                delay = get_retry_delay(response, attempt)
+                print(f"⏳ {url} returned {response.status_code}, retrying in {delay:.0f}s...")
+                time.sleep(delay)
+                continue
+
+            count("bytes", len(response.content))
+            return response
+
+    def get_all(self, path, params=None):
+        """GET every page of a list endpoint, following offset and keyset pagination.
+
+        Returns None when a page cannot be fetched, a partial listing is never returned.
+        """
+        params = {"per_page": PER_PAGE, **(params or {})}
+        items = []
+
+        while path:
+            response = self.get(path, params)
+            if response.status_code != 200:
+                print(f"❌ Failed to fetch {response.url}: {response.status_code}, the listing is incomplete")
+                return None
+
+            page = response.json()
+            if not isinstance(page, list):
+                print(f"❌ Unexpected response of {response.url}, the listing is incomplete")
+                return None
+            items.extend(page)
+
+            next_page = response.headers.get("X-Next-Page")
+            next_link = response.links.get("next", {}).get("url")
+            if next_page:
+                params = {**(params or {}), "page": next_page}
+            elif next_link:
+                # Keyset pagination only links the next page, the link holds every parameter
+                path, params = next_link, None
+            else:
+                path = None
+
+        return items
+
+    def map(self, function, items):
+        """Apply a function to every item concurrently, keeping the order of the items."""
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(function, items))
+
+
+def get_backoff_delay(attempt):
+    """Exponential backoff delay in seconds."""
+    return min(2 ** attempt, 60)
+
+
+def get_retry_delay(response, attempt):
+    """Read the delay requested by the server from Retry-After, or fall back to exponential backoff."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        if retry_after.isdigit():
+            return int(retry_after)
+        try:
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            pass
+
+    reset_at = response.headers.get("RateLimit-Reset")
+    if reset_at and reset_at.isdigit():
+        return max(int(reset_at) - time.time(), 0)
+
+    return get_backoff_delay(attempt)
+
+
+client = GitLabClient(
+    GITLAB_URL, TOKEN,
+    cache=HttpCache(CACHE_DIR, CACHE_TTL) if CACHE_ENABLED or OFFLINE else None,
+    offline=OFFLINE
+)
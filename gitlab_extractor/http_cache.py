@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers needed to replay a cached response, including pagination and validators
+CACHED_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Link", "X-Next-Page", "X-Page", "X-Total", "X-Total-Pages"]
+
+
+class HttpCache:
+    """On-disk cache of GET responses with a TTL, revalidated with ETag / Last-Modified."""
+
+    def __init__(self, cache_dir, ttl_seconds):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+
+    def get_path(self, url):
+        """Return the cache file of a request URL."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, url):
+        """Load the cached entry of a URL, returns None on a miss."""
+        try:
+            with open(self.get_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        """Check whether an entry is younger than the TTL."""
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def save(self, url, response):
+        """Store a successful response, returns the stored entry."""
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            "body": response.text,
+            "fetched_at": time.time(),
+        }
+        self.write(url, entry)
+        return entry
+
+    def refresh(self, url, entry, response):
+        """Mark an entry as fresh again after the server answered 304 Not Modified."""
+        for name in ("ETag", "Last-Modified"):
+            if name in response.headers:
+                entry["headers"][name] = response.headers[name]
+        entry["fetched_at"] = time.time()
+        self.write(url, entry)
+        return entry
+
+    def write(self, url, entry):
+        """Atomically write an entry, concurrent writers of the same URL never leave a partial file."""
+        path = self.get_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+
+def get_conditional_headers(entry):
+    """Build the revalidation headers of a cached entry."""
+    headers = {}
+    if "ETag" in entry["headers"]:
+        headers["If-None-Match"] = entry["headers"]["ETag"]
+    if "Last-Modified" in entry["headers"]:
+        headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    return headers
+
+
+def to_response(entry):
+    """Turn a cached entry back into a requests.Response."""
+    response = requests.Response()
+    response.status_code = entry["status_code"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = entry["url"]
+    return response
+
+
+def make_offline_miss_response(url):
+    """Response returned in offline mode when a URL was never cached."""
+    response = requests.Response()
+    response.status_code = 504
+    response._content = b'{"message": "Not cached (offline mode)"}'
+    response.encoding = "utf-8"
+    response.url = url
+    return response
@@ -0,0 +1,169 @@
+import os
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from analyzer import (
+    DIAGNOSTIC_SCORES, analyze_commit, build_solution, export_analyzer_results, find_solution_file,
+    get_relative_path, parse_analyzer_results, run_builtin_roslyn_metrics
+)
+from result_cache import get_commit_sha, get_analyzer_fingerprint, get_cached_result, store_result
+from solution_parser import get_project_references, get_solution_projects
+
+# Changes of these files can affect every project, so they always trigger a full analysis
+FULL_ANALYSIS_EXTENSIONS = (".sln", ".slnx", ".props", ".targets")
+FULL_ANALYSIS_FILES = ("global.json", "nuget.config")
+
+
+def get_changed_files(repo_path, base_commit_sha, commit_sha):
+    """List the repository relative paths changed between two commits, including deleted files."""
+    output = subprocess.run(
+        ["git", "-C", repo_path, "diff", "--name-only", "-z", "--no-renames", base_commit_sha, commit_sha],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return [path for path in output.split("\0") if path]
+
+
+def get_project_dirs(repo_path, solution_path):
+    """Map the repository relative path of every project of the solution to its directory."""
+    project_dirs = {}
+    for project_path in get_solution_projects(solution_path):
+        relative_path = get_relative_path(project_path, repo_path)
+        project_dirs[relative_path] = os.path.dirname(relative_path)
+    return project_dirs
+
+
+def find_owner_project(file_path, project_dirs):
+    """Find the project whose directory contains a file, the innermost project wins."""
+    owner = None
+    owner_dir_length = -1
+    for project, project_dir in project_dirs.items():
+        if project_dir and not file_path.startswith(project_dir + "/"):
+            continue
+        if len(project_dir) > owner_dir_length:
+            owner = project
+            owner_dir_length = len(project_dir)
+    return owner
+
+
+def get_changed_projects(changed_files, project_dirs):
+    """Select the projects to reanalyze, returns None when the changes require a full analysis."""
+    changed_projects = set()
+    for file_path in changed_files:
+        file_name = os.path.basename(file_path).lower()
+        if file_path.endswith(FULL_ANALYSIS_EXTENSIONS) or file_name in FULL_ANALYSIS_FILES:
+            return None
+        if not (file_path.endswith(".cs") or file_path.endswith(".csproj")):
+            continue
+
+        owner = find_owner_project(file_path, project_dirs)
+        if owner is None:
+            # Linked or generated sources outside of every project directory
+            return None
+        changed_projects.add(owner)
+    return changed_projects
+
+
+def get_dependent_projects(repo_path, project_dirs):
+    """Map every project of the solution to the projects of the solution referencing it directly."""
+    dependents = {project: set() for project in project_dirs}
+    for project in project_dirs:
+        for reference in get_project_references(os.path.join(repo_path, project)):
+            referenced = get_relative_path(reference, repo_path)
+            if referenced in dependents:
+                dependents[referenced].add(project)
+    return dependents
+
+
+def add_dependent_projects(changed_projects, dependents):
+    """Extend the changed projects with every project referencing one of them, directly or transitively."""
+    affected = set(changed_projects)
+    pending = list(changed_projects)
+    while pending:
+        for dependent in dependents.get(pending.pop(), ()):
+            if dependent not in affected:
+                affected.add(dependent)
+                pending.append(dependent)
+    return affected
+
+
+def analyze_changed_projects(repo_path, project_paths):
+    """Run the analyzers on single projects and merge their results."""
+    result = {"projects": {}, "files": {}}
+    for project_path in project_paths:
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, "analysis_results.xml")
+            export_analyzer_results(os.path.join(repo_path, project_path), output_path)
+            if not os.path.exists(output_path):
+                raise RuntimeError(f"Analyzer did not write its results to {output_path}")
+            project_result = parse_analyzer_results(output_path, repo_path)
+
+        result["projects"].update(project_result["projects"])
+        result["files"].update(project_result["files"])
+    return result
+
+
+def merge_results(base_result, changed_result, project_dirs, changed_projects):
+    """Combine reused per-project counts of the base commit with the reanalyzed projects and recompute the totals."""
+    projects = {
+        project: counts for project, counts in base_result.get("projects", {}).items()
+        if project in project_dirs and project not in changed_projects
+    }
+    projects.update(changed_result["projects"])
+
+    files = {}
+    for file_path, counts in base_result.get("files", {}).items():
+        owner = find_owner_project(file_path, project_dirs)
+        if owner in projects and owner not in changed_projects:
+            files[file_path] = counts
+    files.update(changed_result["files"])
+
+    result = {score: sum(counts[score] for counts in projects.values()) for score in DIAGNOSTIC_SCORES.values()}
+    result["projects"] = projects
+    result["files"] = files
+    return result
+
+
+def analyze_commit_incrementally(repo_path, base_commit_sha):
+    """Analyze a commit reusing the analyzer results of an earlier commit for the projects that did not change.
+
+    Projects containing changed .cs / .csproj files are reanalyzed together with every project referencing them
+    through <ProjectReference>, directly or transitively, as changed types can change the diagnostics of their
+    users. Falls back to a full analysis whenever this cannot be decided.
+    """
+    commit_sha = get_commit_sha(repo_path)
+    fingerprint = get_analyzer_fingerprint()
+    base_result = get_cached_result("analyzers", base_commit_sha, fingerprint) if base_commit_sha else None
+    if base_result is None or "projects" not in base_result or get_cached_result("analyzers", commit_sha, fingerprint):
+        return analyze_commit(repo_path)
+
+    solution_path = find_solution_file(repo_path)
+    if not solution_path:
+        print("❌ No solution found.")
+        return None, None
+
+    try:
+        project_dirs = get_project_dirs(repo_path, solution_path)
+        changed_projects = get_changed_projects(get_changed_files(repo_path, base_commit_sha, commit_sha), project_dirs)
+        if changed_projects is not None:
+            changed_projects = add_dependent_projects(changed_projects, get_dependent_projects(repo_path, project_dirs))
+    except (OSError, subprocess.SubprocessError, ET.ParseError) as e:
+        print(f"⚠️ Could not find the projects changed in {base_commit_sha}..{commit_sha}: {e}")
+        changed_projects = None
+
+    if changed_projects is None:
+        print(f"🔁 Changes of {commit_sha} affect the whole solution, running a full analysis.")
+        return analyze_commit(repo_path)
+
+    print(f"🧩 Reanalyzing {len(changed_projects)} of {len(project_dirs)} projects for {repo_path} ...")
+    build_solution(solution_path)
+
+    try:
+        changed_result = analyze_changed_projects(repo_path, sorted(changed_projects))
+    except (RuntimeError, subprocess.SubprocessError) as e:
+        print(f"❌ Error running analyzer: {e}")
+        return None, run_builtin_roslyn_metrics(repo_path, solution_path)
+
+    analysis_result = merge_results(base_result, changed_result, project_dirs, changed_projects)
+    store_result("analyzers", commit_sha, analysis_result, fingerprint)
+
+    return analysis_result, run_builtin_roslyn_metrics(repo_path, solution_path)
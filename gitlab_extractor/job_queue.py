@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import traceback
+import yaml
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+QUEUE_CONFIG = config.get("job_queue", {})
+QUEUE_PATH = QUEUE_CONFIG.get("path", "./cache/jobs.sqlite")
+RETRY_FAILED = QUEUE_CONFIG.get("retry_failed", False)  # Run failed jobs again without `python job_queue.py retry`
+CHECKPOINT_INTERVAL = QUEUE_CONFIG.get("checkpoint_interval", 50)  # Finished jobs between two rewrites of the result files
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+@contextmanager
+def open_queue():
+    """Open the job database in a transaction, creating it if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(QUEUE_PATH)), exist_ok=True)
+    connection = sqlite3.connect(QUEUE_PATH, timeout=60)
+    connection.execute(
+        """CREATE TABLE IF NOT EXISTS jobs (
+            run TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (run, key)
+        )"""
+    )
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def make_job_key(name, commit_sha, fingerprint):
+    """Key of a job analyzing a commit with a configuration, a changed commit or configuration is a new job."""
+    return f"{name}@{commit_sha}#{fingerprint[:16]}"
+
+
+def add_jobs(run_name, jobs):
+    """Register the jobs of a run, jobs already known keep their state and result."""
+    with open_queue() as connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO jobs (run, key, payload, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+            [(run_name, key, json.dumps(payload), PENDING, time.time()) for key, payload in jobs.items()]
+        )
+        # Jobs of a killed run never finished
+        connection.execute(
+            "UPDATE jobs SET state = ?, updated_at = ? WHERE run = ? AND state = ?",
+            (PENDING, time.time(), run_name, RUNNING)
+        )
+        if RETRY_FAILED:
+            connection.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE run = ? AND state = ?",
+                (PENDING, time.time(), run_name, FAILED)
+            )
+
+
+def get_jobs(run_name, state):
+    """List the keys of the jobs of a run in the given state."""
+    with open_queue() as connection:
+        rows = connection.execute("SELECT key FROM jobs WHERE run = ? AND state = ?", (run_name, state)).fetchall()
+    return {key for key, in rows}
+
+
+def set_state(run_name, key, state, result=None, error=None):
+    """Update the state of a job, storing its result or error."""
+    with open_queue() as connection:
+        connection.execute(
+            """UPDATE jobs SET state = ?, result = ?, error = ?, updated_at = ?,
+               attempts = attempts + (CASE WHEN ? = 'running' THEN 1 ELSE 0 END)
+               WHERE run = ? AND key = ?""",
+            (state, json.dumps(result) if result is not None else None, error, time.time(), state, run_name, key)
+        )
+
+
+def get_results(run_name, keys=None):
+    """Return the results of the finished jobs of a run, optionally only of the given keys."""
+    with open_queue() as connection:
+        rows = connection.execute("SELECT key, result FROM jobs WHERE run = ? AND state = ?", (run_name, DONE)).fetchall()
+    return {key: json.loads(result) for key, result in rows if keys is None or key in keys}
+
+
+def run_jobs(run_name, jobs, function, workers=1, on_result=None, pipeline=None, on_checkpoint=None):
+    """Run the unfinished jobs of a run and record every outcome as soon as it is known.
+
+    `jobs` maps a job key to the arguments of `function`. Jobs finished by an earlier run are skipped, so a
+    killed run resumes where it stopped. `on_result(key, result)` is called after every finished job, e.g. to
+    store its row, and `on_checkpoint()` after every CHECKPOINT_INTERVAL finished jobs, e.g. to rewrite the
+    output files. With a `pipeline`, the arguments tuple of every job is passed to its first stage instead of
+    calling `function`. Returns the results of all finished jobs of `jobs`.
+    """
+    add_jobs(run_name, jobs)
+    pending_keys = get_jobs(run_name, PENDING)
+    pending = [key for key in jobs if key in pending_keys]
+
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        print(f"⏭️ Skipping {skipped} of {len(jobs)} jobs of {run_name}, they are finished or failed.")
+
+    finished_count = 0
+
+    def finish(key, result, error=None):
+        nonlocal finished_count
+        if error is None and result is None:
+            error = "No result"
+        if error is None:
+            set_state(run_name, key, DONE, result=result)
+            if on_result:
+                on_result(key, result)
+            finished_count += 1
+            if on_checkpoint and CHECKPOINT_INTERVAL and finished_count % CHECKPOINT_INTERVAL == 0:
+                on_checkpoint()
+        else:
+            set_state(run_name, key, FAILED, error=error)
+            print(f"❌ Job {key} of {run_name} failed: {error.strip().splitlines()[-1]}")
+
+    def start_pending():
+        for key in pending:
+            set_state(run_name, key, RUNNING)
+            yield key, jobs[key]
+
+    if pipeline:
+        pipeline.run(start_pending(), on_result=finish, on_error=lambda key, error: finish(key, None, error))
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for key in pending:
+                set_state(run_name, key, RUNNING)
+                futures[executor.submit(function, *jobs[key])] = key
+            for future in as_completed(futures):
+                try:
+                    finish(futures[future], future.result())
+                except Exception:
+                    finish(futures[future], None, traceback.format_exc())
+    else:
+        for key in pending:
+            set_state(run_name, key, RUNNING)
+            try:
+                result = function(*jobs[key])
+            except Exception:
+                finish(key, None, traceback.format_exc())
+                continue
+            finish(key, result)
+
+    return get_results(run_name, set(jobs))
+
+
+def retry_failed(run_name=None):
+    """Mark failed jobs as pending again, so the next run executes them."""
+    with open_queue() as connection:
+        if run_name:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE run = ? AND state = ?",
+                (PENDING, time.time(), run_name, FAILED)
+            )
+        else:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE state = ?", (PENDING, time.time(), FAILED)
+            )
+    return cursor.rowcount
+
+
+def reset_run(run_name):
+    """Forget every job of a run, so the next run starts from scratch."""
+    with open_queue() as connection:
+        cursor = connection.execute("DELETE FROM jobs WHERE run = ?", (run_name,))
+    return cursor.rowcount
+
+
+def print_status():
+    """Print the number of jobs per run and state."""
+    with open_queue() as connection:
+        rows = connection.execute("SELECT run, state, COUNT(*) FROM jobs GROUP BY run, state ORDER BY run, state").fetchall()
+    for run_name, state, count in rows:
+        print(f"{run_name}\t{state}\t{count}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "retry":
+        print(f"🔁 {retry_failed(sys.argv[2] if len(sys.argv) > 2 else None)} failed jobs will run again.")
+    elif command == "reset" and len(sys.argv) > 2:
+        print(f"🧹 Removed {reset_run(sys.argv[2])} jobs of {sys.argv[2]}.")
+    elif command == "status":
+        print_status()
+    else:
+        print("Usage: python job_queue.py [status | retry [run] | reset <run>]")
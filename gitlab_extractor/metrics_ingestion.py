@@ -0,0 +1,127 @@
+import os
+import numpy as np
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from solution_parser import get_solution_projects
+
+METRIC_NAMES = [
+    "MaintainabilityIndex",
+    "CyclomaticComplexity",
+    "ClassCoupling",
+    "DepthOfInheritance",
+    "SourceLines",
+    "ExecutableLines",
+]
+AVERAGED_METRICS = METRIC_NAMES[:4]  # Averaged over the projects of a solution
+TOTAL_METRICS = METRIC_NAMES[4:]  # Summed over the projects of a solution
+
+# Elements owning a <Metrics> block, in nesting order; members (methods, properties, ...) are skipped
+LEVELS = {"Assembly": 0, "Namespace": 1, "NamedType": 2}
+ASSEMBLY, NAMESPACE, TYPE = 0, 1, 2
+
+MAX_PARSER_THREADS = 8
+
+
+def find_metrics_files(solution_path):
+    """Locate the <Project>.Metrics.xml written next to every project of the solution."""
+    metrics_files = []
+    for project_path in get_solution_projects(solution_path):
+        project_name = os.path.splitext(os.path.basename(project_path))[0]
+        metrics_file = os.path.join(os.path.dirname(project_path), f"{project_name}.Metrics.xml")
+        if os.path.exists(metrics_file):
+            metrics_files.append(metrics_file)
+    return metrics_files
+
+
+def parse_metrics_file(path):
+    """Stream-parse a metrics report into (level, name, values) rows of the assembly, its namespaces and types."""
+    rows = []
+    tags = []
+    names = []
+    values = None
+
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            tags.append(element.tag)
+            if element.tag in LEVELS:
+                names.append(element.attrib.get("Name", ""))
+            elif element.tag == "Metrics" and len(tags) > 1 and tags[-2] in LEVELS:
+                values = [0] * len(METRIC_NAMES)
+            continue
+
+        tags.pop()
+        if element.tag == "Metric" and values is not None:
+            name = element.attrib.get("Name")
+            if name in METRIC_NAMES:
+                values[METRIC_NAMES.index(name)] = int(element.attrib.get("Value"))
+        elif element.tag == "Metrics" and values is not None:
+            level = LEVELS[tags[-1]]
+            # Types are named after their namespace, so the same type name in two namespaces stays apart
+            name = names[-1] if level != TYPE else ".".join(names[1:])
+            rows.append((level, name, values))
+            values = None
+        elif element.tag in LEVELS:
+            names.pop()
+            element.clear()
+
+    return rows
+
+
+def try_parse_metrics_file(path):
+    """Parse a metrics report, returns None instead of raising on a broken file."""
+    try:
+        return parse_metrics_file(path)
+    except Exception as e:
+        print(f"⚠️ Error parsing {path}: {e}")
+        return None
+
+
+def load_metrics(metrics_files):
+    """Parse metrics reports in a thread pool into columnar arrays.
+
+    Every row is an assembly, namespace or type: `file` indexes `files`, `level` is ASSEMBLY / NAMESPACE /
+    TYPE and `values` holds one column per entry of METRIC_NAMES.
+    """
+    metrics_files = list(metrics_files)
+    if len(metrics_files) > 1:
+        with ThreadPoolExecutor(max_workers=min(MAX_PARSER_THREADS, len(metrics_files))) as executor:
+            parsed_files = list(executor.map(try_parse_metrics_file, metrics_files))
+    else:
+        parsed_files = [try_parse_metrics_file(path) for path in metrics_files]
+
+    files, file_indices, levels, names, values = [], [], [], [], []
+    for path, rows in zip(metrics_files, parsed_files):
+        if rows is None:
+            continue
+        file_index = len(files)
+        files.append(path)
+        for level, name, row_values in rows:
+            file_indices.append(file_index)
+            levels.append(level)
+            names.append(name)
+            values.append(row_values)
+
+    return {
+        "files": files,
+        "file": np.array(file_indices, dtype=np.int32),
+        "level": np.array(levels, dtype=np.int8),
+        "name": np.array(names, dtype=object),
+        "values": np.array(values, dtype=np.int64).reshape(len(values), len(METRIC_NAMES)),
+    }
+
+
+def average_project_metrics(metrics):
+    """Average the assembly level metrics over the projects and sum the line counts, None without projects."""
+    # The first <Metrics> of a report belongs to its assembly, so there is one assembly row per project
+    assembly_values = metrics["values"][metrics["level"] == ASSEMBLY]
+    contributing_projects = len(assembly_values)
+    if contributing_projects == 0:
+        return None
+
+    sums = assembly_values.sum(axis=0)
+    averaged_metrics = {
+        name: round(int(sums[METRIC_NAMES.index(name)]) / contributing_projects)
+        for name in AVERAGED_METRICS
+    }
+    averaged_metrics.update({name: int(sums[METRIC_NAMES.index(name)]) for name in TOTAL_METRICS})
+    return averaged_metrics
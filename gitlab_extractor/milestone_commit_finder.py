@@ -1,8 +1,14 @@
-import requests
-import datetime
 import json
 import yaml
+import numpy as np
 from fuzzywuzzy import fuzz
+from gitlab_client import client
+from profiler import traced
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz, process as rapidfuzz_process
+except ImportError:  # Only used with milestone_matcher: rapidfuzz, fuzzywuzzy matches without it
+    rapidfuzz_process = None
 
 # === Load Configuration ===
 with open("config.yml", "r") as file:
@@ -12,149 +18,190 @@ with open("config.yml", "r") as file:
 GITLAB_URL = config["gitlab"]["url"]
 GROUP_ID = config["gitlab"]["group_id"] + ("%2f" + config["gitlab"]["subgroup_id"] if config["gitlab"]["subgroup_id"] else "")
 TOKEN = config["gitlab"]["token"]  # GitLab API token with read_repository permission
+MILESTONE_MATCHER = config["gitlab"].get("milestone_matcher", "fuzzywuzzy")  # "fuzzywuzzy" or "rapidfuzz" (all cores, slightly different scores)
+MATCH_THRESHOLD = 70  # A milestone title has to match a keyword better than this
 
-HEADERS = {"PRIVATE-TOKEN": TOKEN}
-
+if MILESTONE_MATCHER == "rapidfuzz" and rapidfuzz_process is None:
+    print("⚠️ milestone_matcher is rapidfuzz but it is not installed (pip install rapidfuzz), matching with fuzzywuzzy")
 
 def get_subgroups(group_id):
-    """Fetch all subgroups inside the main group."""
-    url = f"{GITLAB_URL}/groups/{group_id}/subgroups?per_page=100"
-    response = requests.get(url, headers=HEADERS)
-    subgroups = response.json()
-    return [subgroup["id"] for subgroup in subgroups] if isinstance(subgroups, list) else []
+    """Fetch all subgroups inside the main group, None if the listing is incomplete."""
+    subgroups = client.get_all(f"groups/{group_id}/subgroups")
+    if subgroups is None:
+        return None
+    return [subgroup["id"] for subgroup in subgroups]
+
+
+def get_group_projects(group_id):
+    """Fetch the ids of the projects directly inside a group, None if the listing is incomplete."""
+    projects = client.get_all(f"groups/{group_id}/projects")
+    if projects is None:
+        return None
+    return [project["id"] for project in projects]
 
 
 def get_projects(group_id):
-    """Fetch all projects inside a subgroup and its direct subgroups (ignores deeper subgroups)."""
+    """Fetch all projects inside a subgroup and its direct subgroups (ignores deeper subgroups).
+
+    Returns None if any of the listings is incomplete.
+    """
     projects = []
     
     # Get projects inside the group
-    url = f"{GITLAB_URL}/groups/{group_id}/projects?per_page=100"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        projects.extend([project["id"] for project in response.json()])
+    group_projects = get_group_projects(group_id)
+    if group_projects is None:
+        return None
+    projects.extend(group_projects)
 
     # Get sub-subgroups and their projects (but not deeper)
     subgroups = get_subgroups(group_id)
-    for subgroup_id in subgroups:
-        url = f"{GITLAB_URL}/groups/{subgroup_id}/projects?per_page=100"
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            projects.extend([project["id"] for project in response.json()])
+    if subgroups is None:
+        return None
+    for subgroup_projects in client.map(get_group_projects, subgroups):
+        if subgroup_projects is None:
+            return None
+        projects.extend(subgroup_projects)
 
     return projects
 
 
-def get_project_milestone_date(project_id, milestone_keywords):
-    """Find the milestone that has the closest fuzzy name match to the given keywords."""
-    url = f"{GITLAB_URL}/projects/{project_id}/milestones?per_page=100"
-    response = requests.get(url, headers=HEADERS)
-    milestones = response.json()
-
-    if not isinstance(milestones, list) or not milestones:
-        return None, 0
-
-    best_milestone = None
-    best_similarity_score = 0
-
-    for milestone in milestones:
-        milestone_title = milestone.get("title", "")
-        due_date = milestone.get("due_date")  # Format: YYYY-MM-DD
-        if not due_date:
-            continue
-
-        # Compute similarity score with each keyword
+def get_project_milestones(project_id):
+    """Fetch all milestones of a project, None if the listing is incomplete."""
+    return client.get_all(f"projects/{project_id}/milestones")
+
+
+def score_titles(titles, keywords):
+    """Partial ratio of every title (rows) against every keyword (columns)."""
+    if MILESTONE_MATCHER == "rapidfuzz" and rapidfuzz_process is not None:
+        return rapidfuzz_process.cdist(titles, keywords, scorer=rapidfuzz_fuzz.partial_ratio, dtype=np.int32, workers=-1)
+    return np.array(
+        [[fuzz.partial_ratio(title, keyword) for keyword in keywords] for title in titles], dtype=np.int32
+    ).reshape(len(titles), len(keywords))
+
+
+@traced("milestone_matching")
+def match_milestones(subgroup_projects, project_milestones, milestone_keyword_sets):
+    """Find the milestone date of every subgroup for every keyword set from the already fetched milestones.
+
+    Every distinct title is scored against every distinct keyword once; the first milestone (in project and
+    milestone order) with the best score above the threshold wins, like matching them one by one.
+    Returns one {subgroup_id: milestone_date or None} per keyword set.
+    """
+    # Collect and normalize the titles of the milestones with a due date once for the whole group
+    title_rows = {}
+    for milestones in project_milestones.values():
+        for milestone in milestones or []:
+            if milestone.get("due_date"):
+                title_rows.setdefault(milestone.get("title", "").lower(), len(title_rows))
+    keyword_columns = {}
+    for milestone_keywords in milestone_keyword_sets:
         for keyword in milestone_keywords:
-            similarity_score = fuzz.partial_ratio(milestone_title.lower(), keyword.lower())
+            keyword_columns.setdefault(keyword.lower(), len(keyword_columns))
 
-            if (similarity_score > best_similarity_score and similarity_score > 70):
-                best_similarity_score = similarity_score
-                best_milestone = due_date
+    scores = score_titles(list(title_rows), list(keyword_columns))
 
-    return best_milestone, best_similarity_score
+    # Best score of every title per keyword set
+    set_scores = np.zeros((len(title_rows), len(milestone_keyword_sets)), dtype=np.int32)
+    for index, milestone_keywords in enumerate(milestone_keyword_sets):
+        if milestone_keywords and title_rows:
+            columns = [keyword_columns[keyword.lower()] for keyword in milestone_keywords]
+            set_scores[:, index] = scores[:, columns].max(axis=1)
 
+    results = [{} for _ in milestone_keyword_sets]
+    for subgroup_id, project_ids in subgroup_projects.items():
+        rows = []
+        due_dates = []
+        for project_id in project_ids:
+            for milestone in project_milestones.get(project_id) or []:
+                if milestone.get("due_date"):
+                    rows.append(title_rows[milestone.get("title", "").lower()])
+                    due_dates.append(milestone["due_date"])  # Format: YYYY-MM-DD
+
+        for index in range(len(milestone_keyword_sets)):
+            results[index][subgroup_id] = None
+        if not rows:
+            continue
 
-def get_commits(project_id, until):
-    """Fetch all commits for a project up to a specific date."""
-    url = f"{GITLAB_URL}/projects/{project_id}/repository/commits"
-    params = {
-        "per_page": 100,
-        "until": until.isoformat()
-    }
-
-    response = requests.get(url, headers=HEADERS, params=params)
-    commits = response.json()
-
-    return commits if isinstance(commits, list) else []
-
-
-def find_last_commit(project_id, milestone_date):
-    """Find the last commit before or on the milestone date."""
-    milestone_datetime = datetime.datetime.strptime(milestone_date, "%Y-%m-%d")
-    
-    commits = get_commits(project_id, until=milestone_datetime)
-
-    if not commits:
-        return None  # No commits found before or on milestone day
-
-    return commits[0]["id"]  # Latest commit before or on milestone date
-
+        subgroup_scores = set_scores[rows]
+        best_rows = subgroup_scores.argmax(axis=0)  # First best milestone per keyword set
+        for index, best_row in enumerate(best_rows):
+            if subgroup_scores[best_row, index] > MATCH_THRESHOLD:
+                results[index][subgroup_id] = due_dates[best_row]
 
-def get_subgroup_milestone_date(group_id, milestone_keywords):
-    """Analyze all subgroups to find the milestone date."""
+    return results
 
-    # Get projects inside this subgroup
-    project_ids = get_projects(group_id)
 
-    # Try to find a project where the milestone date is set
-    best_milestone_date = None
-    best_milestone_date_score = 0
-    for project_id in project_ids:
-        milestone_date, milestone_date_score = get_project_milestone_date(project_id, milestone_keywords)
-        if milestone_date_score > best_milestone_date_score:
-           best_milestone_date_score = milestone_date_score
-           best_milestone_date = milestone_date
+@traced("group_tree")
+def get_group_tree():
+    """Fetch the subgroups, their projects and the milestones of every project in one crawl.
 
-    return best_milestone_date
+    A subgroup is left out when one of its listings is incomplete, so it is never analyzed with missing projects.
+    """
+    subgroup_ids = get_subgroups(GROUP_ID)
+    if subgroup_ids is None:
+        raise RuntimeError(f"Could not list the subgroups of {GROUP_ID}")
+    if not subgroup_ids:
+        subgroup_ids.append(GROUP_ID)
 
+    # Get projects inside the subgroups and their direct subgroups
+    subgroup_projects = {}
+    for subgroup_id, project_ids in zip(subgroup_ids, client.map(get_projects, subgroup_ids)):
+        if project_ids is None:
+            print(f"❌ Skipping subgroup {subgroup_id}, its projects could not be listed")
+            continue
+        subgroup_projects[subgroup_id] = project_ids
 
+    project_ids = list(dict.fromkeys(
+        project_id for project_ids in subgroup_projects.values() for project_id in project_ids
+    ))
+    project_milestones = dict(zip(project_ids, client.map(get_project_milestones, project_ids)))
 
-def get_milestone_commits(milestone_keywords):
-    """Analyze all projects, find milestones, and fetch all commits."""
+    # The milestone of a subgroup may be set in any of its projects
+    for subgroup_id, project_ids in list(subgroup_projects.items()):
+        if any(project_milestones[project_id] is None for project_id in project_ids):
+            print(f"❌ Skipping subgroup {subgroup_id}, the milestones of its projects could not be listed")
+            del subgroup_projects[subgroup_id]
 
-    subgroup_ids = get_subgroups(GROUP_ID)
-    if not subgroup_ids:
-        subgroup_ids.append(GROUP_ID)
+    return subgroup_projects, project_milestones
 
-    results = {}
 
-    for subgroup_id in subgroup_ids:
-        print(f"Analyzing subgroup {subgroup_id}...")
+def get_all_milestone_commits(milestone_keyword_sets):
+    """Find the last commit of every project for all milestones, crawling the group only once."""
+    subgroup_projects, project_milestones = get_group_tree()
 
-        # Get projects inside this subgroup and its direct subgroups
-        project_ids = get_projects(subgroup_id)
-        milestone_date = get_subgroup_milestone_date(subgroup_id, milestone_keywords)
+    # Match every milestone in memory, no per-project request is needed after the crawl
+    milestone_dates = match_milestones(subgroup_projects, project_milestones, milestone_keyword_sets)
 
-        if not milestone_date:
-            print(f"❌ No close milestone match found for group {subgroup_id}")
-            continue
+    matches = []
+    for index, milestone_keywords in enumerate(milestone_keyword_sets):
+        for subgroup_id, project_ids in subgroup_projects.items():
+            print(f"Analyzing subgroup {subgroup_id} for milestone {milestone_keywords}...")
+            milestone_date = milestone_dates[index][subgroup_id]
 
-        for project_id in project_ids:
-            print(f"Fetching commits for project {project_id}...")
+            if not milestone_date:
+                print(f"❌ No close milestone match found for group {subgroup_id}")
+                continue
 
-            # Get the last commit before or on the milestone date
-            last_commit = find_last_commit(project_id, milestone_date)
+            for project_id in project_ids:
+                matches.append((index, project_id, milestone_date))
 
-            # Store results
-            results[project_id] = {
-                "project_id": project_id,
-                "milestone_date": milestone_date,
-                "last_commit_id": last_commit,
-            }
+    results = [{} for _ in milestone_keyword_sets]
+    for index, project_id, milestone_date in matches:
+        # Store results, the last commit is resolved from the local clone (see git_history)
+        results[index][project_id] = {
+            "project_id": project_id,
+            "milestone_date": milestone_date,
+            "last_commit_id": None,
+        }
 
-            print(f"✅ Processed project {project_id}.")
+    print(f"✅ Processed {len(project_milestones)} projects for {len(milestone_keyword_sets)} milestones.")
 
     # with open("commit_data.json", "w") as f:
     #       json.dump(results, f, indent=4)
-    
+
     return results
+
+
+def get_milestone_commits(milestone_keywords):
+    """Analyze all projects, find milestones, and fetch all commits."""
+    return get_all_milestone_commits([milestone_keywords])[0]
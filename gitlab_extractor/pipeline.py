@@ -0,0 +1,139 @@
+import queue
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from profiler import span
+
+_END = object()  # Marks the end of the input of a stage
+
+
+def run_stage(name, function, key, value):
+    """Run a stage function on one item, timed as a span of the item's key."""
+    with span(f"stage:{name}", key):
+        return function(value)
+
+
+class Stage:
+    """One step of a pipeline, run by `workers` threads or by a process pool of that size.
+
+    The function receives the value produced by the previous stage and returns the value passed on to the
+    next one. Returning None drops the item, raising an exception reports it as failed.
+    """
+
+    def __init__(self, name, function, workers=1, processes=False):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.processes = processes
+
+
+class Pipeline:
+    """Run items through stages connected by bounded queues, so every stage works on a different item at once.
+
+    I/O bound stages (GitLab API, clones) run on threads, CPU bound ones (build, analysis) in process pools.
+    A full queue blocks the stage in front of it, which keeps at most `queue_size` items waiting per stage.
+    """
+
+    def __init__(self, stages, queue_size=2):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items, on_result=None, on_error=None):
+        """Push (key, value) items through all stages; the callbacks run on the calling thread.
+
+        If iterating `items` raises, the items fed so far still finish and a RuntimeError is raised afterwards.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        outcomes = queue.Queue()  # Unbounded, so finishing an item never blocks a stage
+        # Forked children could inherit a lock held by one of the pipeline's threads (profiler, logging)
+        executors = [
+            ProcessPoolExecutor(max_workers=stage.workers, mp_context=multiprocessing.get_context("spawn"))
+            if stage.processes else None
+            for stage in self.stages
+        ]
+
+        for index, stage in enumerate(self.stages):
+            next_queue = queues[index + 1] if index + 1 < len(self.stages) else None
+            workers = [
+                threading.Thread(
+                    target=self.work, args=(stage, executors[index], queues[index], next_queue, outcomes), daemon=True
+                )
+                for _ in range(stage.workers)
+            ]
+            for worker in workers:
+                worker.start()
+            # Once every worker of a stage has stopped, the next stage gets its end markers
+            closer = threading.Thread(
+                target=self.close_stage, args=(workers, next_queue, index + 1, outcomes), daemon=True
+            )
+            closer.start()
+
+        feeder = threading.Thread(target=self.feed, args=(items, queues[0], outcomes), daemon=True)
+        feeder.start()
+
+        input_error = None
+        try:
+            while True:
+                outcome = outcomes.get()
+                if outcome is _END:
+                    break
+                status, key, value = outcome
+                if status == "done" and on_result:
+                    on_result(key, value)
+                elif status == "failed" and on_error:
+                    on_error(key, value)
+                elif status == "input_failed":
+                    input_error = value  # The items already fed still finish
+        finally:
+            for executor in executors:
+                if executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+        if input_error:
+            raise RuntimeError(f"Reading the pipeline input failed: {input_error}")
+
+    def feed(self, items, first_queue, outcomes):
+        """Put the input items into the first stage, the stages always get their end markers."""
+        try:
+            for item in items:
+                first_queue.put(item)
+        except Exception:
+            outcomes.put(("input_failed", None, traceback.format_exc()))
+        finally:
+            for _ in range(self.stages[0].workers):
+                first_queue.put(_END)
+
+    def close_stage(self, workers, next_queue, next_index, outcomes):
+        """Wait for the workers of a stage and pass the end of the input on."""
+        for worker in workers:
+            worker.join()
+        if next_queue is None:
+            outcomes.put(_END)
+            return
+        for _ in range(self.stages[next_index].workers):
+            next_queue.put(_END)
+
+    def work(self, stage, executor, input_queue, next_queue, outcomes):
+        """Process items of one stage until its input ends."""
+        while True:
+            item = input_queue.get()
+            if item is _END:
+                return
+
+            key, value = item
+            try:
+                if executor:
+                    result = executor.submit(run_stage, stage.name, stage.function, key, value).result()
+                else:
+                    result = run_stage(stage.name, stage.function, key, value)
+            except Exception:
+                outcomes.put(("failed", key, f"{stage.name}: {traceback.format_exc()}"))
+                continue
+
+            if result is None:
+                outcomes.put(("failed", key, f"{stage.name}: No result"))
+            elif next_queue is None:
+                outcomes.put(("done", key, result))
+            else:
+                next_queue.put((key, result))
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import shutil
+import signal
+import subprocess
+import yaml
+from profiler import span, record_child_usage
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+PROCESS_CONFIG = config.get("process", {})
+LOG_DIR = PROCESS_CONFIG.get("log_dir", "./logs")
+STATUS_FILE = os.path.join(LOG_DIR, "steps.jsonl")
+DEFAULT_TIMEOUT = PROCESS_CONFIG.get("default_timeout", 1800)  # Seconds, 0 = no timeout
+STEP_TIMEOUTS = PROCESS_CONFIG.get("timeouts", {})  # Per step overrides, e.g. {"build": 1800, "unity": 3600}
+MEMORY_LIMIT_MB = PROCESS_CONFIG.get("memory_limit_mb", 0)  # 0 = unlimited
+USE_CGROUP = PROCESS_CONFIG.get("cgroup", False)  # Enforce the memory limit with a systemd-run scope
+
+IS_WINDOWS = os.name == "nt"
+
+
+def get_timeout(step):
+    """Wall-clock timeout of a step in seconds, None if it may run forever."""
+    return STEP_TIMEOUTS.get(step, DEFAULT_TIMEOUT) or None
+
+
+def get_log_key(path):
+    """Identify the logs of a checkout as <repository>/<commit>, from any directory inside it."""
+    try:
+        output = subprocess.run(
+            ["git", "-C", path, "rev-parse", "--git-common-dir", "HEAD"],
+            check=True, capture_output=True, text=True
+        ).stdout.split()
+        # Worktrees share the .git directory of their clone, which is named after the project
+        repo_name = os.path.basename(os.path.dirname(os.path.abspath(os.path.join(path, output[0]))))
+        return f"{repo_name}/{output[1]}"
+    except (subprocess.CalledProcessError, IndexError, OSError):
+        return os.path.basename(os.path.normpath(path)) or "unknown"
+
+
+def get_log_path(log_key, step):
+    """Log file of a step, every commit gets its own log directory."""
+    log_dir = os.path.join(LOG_DIR, log_key)
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, f"{step}.log")
+
+
+def limit_memory(command, env):
+    """Apply the memory limit: a hard GC heap limit for .NET, and a cgroup around the whole tree if enabled.
+
+    RLIMIT_AS cannot be used, the .NET runtime reserves far more address space than it ever commits and
+    fails to start under it.
+    """
+    if not MEMORY_LIMIT_MB:
+        return command, env
+
+    env = dict(env if env is not None else os.environ)
+    env["DOTNET_GCHeapHardLimit"] = hex(MEMORY_LIMIT_MB * 1024 * 1024)
+
+    if USE_CGROUP and not IS_WINDOWS and shutil.which("systemd-run"):
+        command = ["systemd-run", "--user", "--scope", "--quiet", "-p", f"MemoryMax={MEMORY_LIMIT_MB}M", *command]
+
+    return command, env
+
+
+def get_process_group_args():
+    """Start the process in its own group, so the whole tree (MSBuild nodes, compilers) can be killed."""
+    if IS_WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(process):
+    """Kill a process and every process it started."""
+    try:
+        if IS_WINDOWS:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    try:
+        process.kill()
+    except OSError:
+        pass
+    process.wait()
+
+
+def wait_process(process, timeout):
+    """Wait for a process like Popen.wait, recording the peak RSS of its tree on the open spans.
+
+    The rusage of wait4 belongs to this child and its waited descendants only, unlike RUSAGE_CHILDREN.
+    """
+    if not hasattr(os, "wait4"):  # Windows
+        return process.wait(timeout=timeout)
+
+    deadline = time.monotonic() + timeout if timeout else None
+    delay = 0.001
+    while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            record_child_usage(usage)
+            return process.returncode
+        if deadline is not None and time.monotonic() >= deadline:
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
+def record_status(log_key, step, command, status, returncode, duration, log_path):
+    """Append the outcome of a step to the status file of the run."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    entry = {
+        "time": time.time(),
+        "key": log_key,
+        "step": step,
+        "command": command,
+        "status": status,
+        "returncode": returncode,
+        "duration": round(duration, 3),
+        "log": log_path,
+    }
+    with open(STATUS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def run_step(step, command, log_key, cwd=None, env=None, timeout=None):
+    """Run one step of a commit's pipeline with its output streamed to a log file.
+
+    Raises CalledProcessError on a non-zero exit code and TimeoutExpired after the step's timeout, in which
+    case the whole process tree has been killed. Both are subprocess.SubprocessError.
+    """
+    with span(step):
+        run_logged(step, command, log_key, cwd, env, timeout)
+
+
+def run_logged(step, command, log_key, cwd, env, timeout):
+    """Run the command of a step, see run_step."""
+    timeout = timeout if timeout is not None else get_timeout(step)
+    log_path = get_log_path(log_key, step)
+    command = [str(part) for part in command]
+    run_command, env = limit_memory(command, env)
+
+    start_time = time.time()
+    returncode = None
+    status = "failed"
+    with open(log_path, "w", encoding="utf-8", errors="replace") as log_file:
+        log_file.write(f"$ {subprocess.list2cmdline(command)}\n")
+        log_file.flush()
+
+        process = subprocess.Popen(
+            run_command, cwd=cwd, env=env,
+            stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT,
+            **get_process_group_args()
+        )
+        try:
+            returncode = wait_process(process, timeout)
+            status = "ok" if returncode == 0 else "failed"
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            status = "timeout"
+            log_file.write(f"\n⏱️ Killed after {timeout}s\n")
+        except BaseException:
+            # Ctrl+C or a cancelled worker must not leave builds running in the background
+            kill_process_tree(process)
+            status = "cancelled"
+            raise
+        finally:
+            record_status(log_key, step, command, status, returncode, time.time() - start_time, log_path)
+
+    if status == "timeout":
+        raise subprocess.TimeoutExpired(command, timeout)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
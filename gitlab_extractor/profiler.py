@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import contextvars
+import yaml
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+PROFILER_CONFIG = config.get("profiler", {})
+PROFILER_ENABLED = PROFILER_CONFIG.get("enabled", True)
+TRACE_DIR = PROFILER_CONFIG.get("trace_dir", "./logs/traces")  # One <run id>.jsonl file per run
+CHROME_TRACE_PATH = PROFILER_CONFIG.get("chrome_trace_path", "")  # optional, e.g. ./logs/trace.json for chrome://tracing
+SUMMARY_COUNT = PROFILER_CONFIG.get("summary_count", 10)  # Slowest stages and projects printed after a run
+
+RUN_ID_VARIABLE = "PROFILER_RUN_ID"  # Passed to worker processes through the environment
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def start_run(name):
+    """Start a profiled run, the spans of this process and its workers are tagged with its id."""
+    run_id = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    os.environ[RUN_ID_VARIABLE] = run_id
+    return run_id
+
+
+def get_run_id():
+    """Id of the current run, empty outside of start_run."""
+    return os.environ.get(RUN_ID_VARIABLE, "")
+
+
+def get_trace_path(run_id):
+    """Trace file of a run, spans recorded outside of start_run share trace.jsonl."""
+    return os.path.join(TRACE_DIR, f"{run_id or 'trace'}.jsonl")
+
+
+def get_children_cpu():
+    """CPU seconds of the finished child processes (dotnet, git, Unity)."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def get_rss_mb(usage):
+    """Peak RSS in MB of an rusage."""
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def record_child_usage(usage):
+    """Add the peak RSS of a waited child process (see process_runner) to the open spans of this thread."""
+    current = _current_span.get()
+    peak_rss_mb = get_rss_mb(usage)
+    while current is not None:
+        current["child_peak_rss_mb"] = max(current["child_peak_rss_mb"], peak_rss_mb)
+        current = current["parent"]
+
+
+def write_record(record):
+    """Append one span to the trace file of its run."""
+    trace_path = get_trace_path(record["run"])
+    os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+    with _write_lock, open(trace_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def span(name, key=None):
+    """Time a stage and record it in the trace; nested spans inherit the (project, commit) key.
+
+    Child CPU time is the rusage growth of all finished child processes, so spans of threads running at the
+    same time share it. Child peak RSS is the largest peak of the steps run by process_runner inside the span.
+    """
+    if not PROFILER_ENABLED:
+        yield
+        return
+
+    parent = _current_span.get()
+    current = {
+        "name": name,
+        "key": key or (parent["key"] if parent else None),
+        "depth": parent["depth"] + 1 if parent else 0,
+        "parent": parent,
+        "child_peak_rss_mb": 0.0,
+        "counters": {},
+    }
+    token = _current_span.set(current)
+
+    status = "error"
+    start_time = time.time()
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    start_child_cpu = get_children_cpu()
+    try:
+        yield
+        status = "ok"
+    finally:
+        _current_span.reset(token)
+        child_cpu = get_children_cpu()
+        write_record({
+            "run": get_run_id(),
+            "name": name,
+            "key": current["key"],
+            "depth": current["depth"],
+            "status": status,
+            "start": start_time,
+            "wall": round(time.perf_counter() - start_wall, 6),
+            "cpu": round(time.thread_time() - start_cpu, 6),
+            "child_cpu": round(child_cpu - start_child_cpu, 6),
+            "child_peak_rss_mb": round(current["child_peak_rss_mb"], 1),
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            **current["counters"],
+        })
+
+
+def traced(name):
+    """Decorator timing every call of a function as a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add to a counter (bytes, cache_hits, cache_misses) of the innermost open span."""
+    current = _current_span.get()
+    if current is not None:
+        current["counters"][name] = current["counters"].get(name, 0) + value
+
+
+def read_trace(run_id):
+    """Read the spans of a run from its trace file."""
+    trace_path = get_trace_path(run_id)
+    if not os.path.exists(trace_path):
+        return []
+
+    records = []
+    with open(trace_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # A line cut off by a killed run
+    return records
+
+
+def write_chrome_trace(records, path):
+    """Convert spans to the Chrome trace event format (chrome://tracing, Perfetto)."""
+    events = [
+        {
+            "name": record["name"],
+            "cat": record["key"] or "run",
+            "ph": "X",
+            "ts": round(record["start"] * 1e6),
+            "dur": round(record["wall"] * 1e6),
+            "pid": record["pid"],
+            "tid": record["tid"],
+            "args": {name: value for name, value in record.items() if name not in ("name", "start", "wall", "pid", "tid")},
+        }
+        for record in records
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events}, f)
+
+
+def summarize(records):
+    """Total the spans per stage and the top level spans per (project, commit)."""
+    stages = {}
+    keys = {}
+    for record in records:
+        stage = stages.setdefault(record["name"], {
+            "count": 0, "wall": 0.0, "cpu": 0.0, "child_cpu": 0.0, "child_peak_rss_mb": 0.0,
+            "bytes": 0, "cache_hits": 0, "cache_misses": 0,
+        })
+        stage["count"] += 1
+        for name in ("wall", "cpu", "child_cpu", "bytes", "cache_hits", "cache_misses"):
+            stage[name] += record.get(name, 0)
+        stage["child_peak_rss_mb"] = max(stage["child_peak_rss_mb"], record.get("child_peak_rss_mb", 0))
+
+        # Nested spans are part of their parent's time, only the outermost ones add up per project
+        if record["key"] and record["depth"] == 0:
+            keys[record["key"]] = keys.get(record["key"], 0.0) + record["wall"]
+
+    return stages, keys
+
+
+def print_summary(run_id=None):
+    """Print the slowest stages and projects of a run."""
+    stages, keys = summarize(read_trace(run_id if run_id is not None else get_run_id()))
+    if not stages:
+        return
+
+    print(f"📊 Slowest stages of {get_run_id() or 'the run'}:")
+    for name, stage in sorted(stages.items(), key=lambda item: item[1]["wall"], reverse=True)[:SUMMARY_COUNT]:
+        print(
+            f"  {name:<24} {stage['count']:>6}x {stage['wall']:>10.1f}s wall {stage['cpu']:>9.1f}s cpu "
+            f"{stage['child_cpu']:>9.1f}s child cpu {stage['child_peak_rss_mb']:>8.0f} MB peak "
+            f"{stage['bytes'] / (1024 * 1024):>8.1f} MB transferred {stage['cache_hits']}/{stage['cache_hits'] + stage['cache_misses']} cache hits"
+        )
+
+    if keys:
+        print("📊 Slowest projects:")
+        for key, wall in sorted(keys.items(), key=lambda item: item[1], reverse=True)[:SUMMARY_COUNT]:
+            print(f"  {key:<60} {wall:>10.1f}s")
+
+
+def finish_run():
+    """Print the summary of the current run and write its Chrome trace if configured."""
+    if not PROFILER_ENABLED:
+        return
+    if CHROME_TRACE_PATH:
+        write_chrome_trace(read_trace(get_run_id()), CHROME_TRACE_PATH)
+    print_summary()
@@ -4,7 +4,15 @@ import json
 import os
 import git
 from urllib.parse import urlparse
-from analyzer import run_analyzers, run_builtin_roslyn_metrics, checkout_commit
+from analyzer import analyze_commit, build_analyzer, get_job_fingerprint, WORKERS
+from worktree_manager import checkout_worktree, prune_worktrees
+from clone_manager import ensure_clone, clone_all
+from dotnet_detection import is_dotnet_core_commit, find_first_dotnet_core_commit
+from git_history import get_commit_position, get_commits_at, list_tags_by_date
+from incremental_analysis import analyze_commit_incrementally
+from job_queue import run_jobs, make_job_key
+from profiler import span, start_run, finish_run
+from results_store import make_row, store_rows, WRITE_JSON
 
 # === Load Configuration ===
 with open("config.yml", "r") as file:
@@ -14,6 +22,7 @@ with open("config.yml", "r") as file:
 REPO_LIST_FILE = config["public_analyzer"]["repository_list"]  # File containing repository URLs
 ANALYZER_DIR = config["analyzer"]["project_dir"]
 CLONE_DIR = config["public_analyzer"]["clone_dir"]
+INCREMENTAL = config["public_analyzer"].get("incremental", False)  # Reanalyze only the projects changed since the previous tag
 
 def load_commit_list():
     """Load a JSON file that contains a list of repos and their commit hashes."""
@@ -33,8 +42,8 @@ def get_repo_name(repo_url):
     owner, project_name = path_parts[0], path_parts[1]
     return f"{owner}_{project_name}"
 
-def clone_repo(repo_url):
-    """Clone the GitLab repository if not cloned yet, using the correct URL."""
+def clone_repo(repo_url, refs=None):
+    """Clone the repository or fetch the missing refs if it is already cloned."""
     if not repo_url:
         print(f"⚠ Skipping project {repo_url} - Repository URL not found")
         return None
@@ -42,29 +51,17 @@ def clone_repo(repo_url):
     project_folder = get_repo_name(repo_url)
     repo_path = os.path.join(CLONE_DIR, project_folder)
 
-    if not os.path.exists(repo_path):
-        print(f"🔄 Cloning repository {project_folder} from {repo_url}...")
-        os.makedirs(CLONE_DIR, exist_ok=True)
-        try:
-            git.Repo.clone_from(repo_url, repo_path)
-        except Exception as e:
-            print(f"Some exception happened: {e}")
-    else:
-        print(f"✅ Repository {repo_url} already exists.")
-        # repo = git.Repo(repo_path)
-        # repo.remotes.origin.pull()
+    try:
+        ensure_clone(repo_url, repo_path, refs)
+    except Exception as e:
+        print(f"Some exception happened: {e}")
 
     return repo_path
 
 def is_dotnet_core_project(repo, commit):
     """Check if a commit uses .NET Core in any .csproj file."""
     try:
-        tree = commit.tree
-        for blob in tree.traverse():
-            if blob.path.endswith(".csproj"):
-                contents = blob.data_stream.read().decode(errors="ignore")
-                if "netcoreapp" in contents.lower() or "net5.0" in contents.lower() or "net6.0" in contents.lower() or "net7.0" in contents.lower() or "net8.0" in contents.lower()or "net9.0" in contents.lower():
-                    return True
+        return is_dotnet_core_commit(repo.git_dir, commit.hexsha)
     except Exception as e:
         print(f"Error reading commit {commit.hexsha}: {e}")
     return False
@@ -72,40 +69,33 @@ def is_dotnet_core_project(repo, commit):
 def get_spaced_commits(repo_path, num_commits=5):
     """Return N spaced commits after the project starts using .NET Core."""
     repo = git.Repo(repo_path)
-    head_commit = repo.head.commit
-
-    all_commits = list(repo.iter_commits(head_commit, reverse=True))  # oldest to newest
+    head_sha = repo.head.commit.hexsha
 
     # Find first .NET Core commit
-    core_start_index = None
-    for i, commit in enumerate(all_commits):
-        if is_dotnet_core_project(repo, commit):
-            core_start_index = i
-            break
+    first_core_sha = find_first_dotnet_core_commit(repo.git_dir, head_sha)
+    first_core_position = get_commit_position(repo.git_dir, first_core_sha, head_sha) if first_core_sha else None
 
-    if core_start_index is None:
+    if first_core_position is None:
         print(f"⚠ Skipping project in {repo_path} - no .NET Core usage found.")
         return []
 
-    filtered_commits = all_commits[core_start_index:]
-
-    if len(filtered_commits) <= num_commits:
-        return [commit.hexsha for commit in filtered_commits]
-
-    step = len(filtered_commits) // (num_commits - 1)
-    selected = [filtered_commits[0].hexsha]
-    for i in range(1, num_commits - 1):
-        selected.append(filtered_commits[i * step].hexsha)
-    selected.append(filtered_commits[-1].hexsha)
+    # rev-list is newest first, so the .NET Core history is made of the first positions
+    commit_count = first_core_position + 1
+    if commit_count <= num_commits:
+        indices = range(commit_count)
+    else:
+        indices = np.linspace(0, commit_count - 1, num_commits, dtype=int)
 
-    # return selected
-    return filtered_commits
+    # Oldest to newest, like the history after the first .NET Core commit
+    positions = [commit_count - 1 - int(i) for i in indices]
+    commits = get_commits_at(repo.git_dir, positions, head_sha)
+    return [commits[position] for position in positions]
 
 def get_spaced_commits_with_tags(repo_path, num_commits=5):
     """Return N spaced commits after the project starts using .NET Core."""
     repo = git.Repo(repo_path)
 
-    tags = sorted(repo.tags, key=lambda t: t.commit.committed_datetime)
+    tags = list_tags_by_date(repo.git_dir)
 
     if len(tags) == 0:
         print("No tags found in repository.")
@@ -120,21 +110,68 @@ def get_spaced_commits_with_tags(repo_path, num_commits=5):
         selected_tags = [tags[i] for i in indices]
 
     # Now get the commits associated with each tag
-    release_commits = [tag.commit for tag in selected_tags]
+    release_commits = [repo.commit(commit_sha) for _, commit_sha in selected_tags]
 
     return release_commits
 
 
+def analyze_tag(worktree_path, repo_url, base_commit_sha=None):
+    """Run the analyzers on a checked out tag and build its result entry."""
+    if base_commit_sha:
+        analysis_result, builtin_analysis_result = analyze_commit_incrementally(worktree_path, base_commit_sha)
+    else:
+        analysis_result, builtin_analysis_result = analyze_commit(worktree_path)
+    if not analysis_result:
+        return None
+    builtin_analysis_result = builtin_analysis_result or {}
+
+    return {
+        "repo_url": repo_url,
+        "bumpy_score": analysis_result.get("bumpy_score"),
+        "fpc_score": analysis_result.get("fpc_score"),
+        "lcom5_score": analysis_result.get("lcom5_score"),
+        "lcom4_score": analysis_result.get("lcom4_score"),
+        "MaintainabilityIndex": builtin_analysis_result.get("MaintainabilityIndex"),
+        "CyclomaticComplexity": builtin_analysis_result.get("CyclomaticComplexity"),
+        "ClassCoupling": builtin_analysis_result.get("ClassCoupling"),
+        "SourceLines": builtin_analysis_result.get("SourceLines"),
+        "projects": analysis_result.get("projects", {}),
+        "files": analysis_result.get("files", {})
+    }
+
+
+def analyze_tag_commit(repo_path, commit_sha, repo_url, base_commit_sha=None):
+    """Check out a tag into its own worktree and analyze it."""
+    with span("tag", f"{get_repo_name(repo_url) or repo_url}@{commit_sha}"):
+        worktree_path = checkout_worktree(repo_path, commit_sha)
+        return analyze_tag(worktree_path, repo_url, base_commit_sha)
+
+
+def save_results(results):
+    """Write the results collected so far, replacing the file atomically."""
+    if not WRITE_JSON:
+        return
+    with open("public_analysis_results.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    os.replace("public_analysis_results.json.tmp", "public_analysis_results.json")
+
+
 def analyze_projects():
     """Analyze all projects with different thresholds."""
     projects = load_commit_list()
 
     results = {}
 
-    for project in projects:
+    start_run("public")
+    build_analyzer()
+    fingerprint = get_job_fingerprint()
+
+    # Only the listed tags are needed, so all repositories are cloned up front in parallel
+    repo_paths = clone_all(lambda project: clone_repo(project["repo"], project["tags"]), projects)
+
+    for project, repo_path in zip(projects, repo_paths):
         repo_url = project["repo"]
         tag_list = project["tags"]
-        repo_path = clone_repo(repo_url)
         if not repo_path:
             continue
 
@@ -142,37 +179,50 @@ def analyze_projects():
         project_id = repo_name if repo_name else repo_url
         results[project_id] = {}
 
+        # One job per tag, every tag gets its own worktree, so the tags can be built side by side
         repo = git.Repo(repo_path)
+        jobs = {}
+        tag_indices = {}
+        base_commit_sha = None
         for i, tag_name in enumerate(tag_list):
             try:
                 if tag_name not in repo.tags:
                     print(f"⚠️ Tag '{tag_name}' not found in {repo_url}")
                     continue
-                tag_ref = repo.tags[tag_name]
-                commit = tag_ref.commit.hexsha
-                checkout_commit(repo_path, commit)
-                analysis_result = run_analyzers(repo_path)
-                builtin_analysis_result  = run_builtin_roslyn_metrics(repo_path)
-                if analysis_result:
-                    if project_id not in results:
-                        results[project_id] = {}
-                    results[project_id][i] = {
-                        "repo_url": project,
-                        "bumpy_score": analysis_result.get("bumpy_score"),
-                        "fpc_score": analysis_result.get("fpc_score"),
-                        "lcom5_score": analysis_result.get("lcom5_score"),
-                        "lcom4_score": analysis_result.get("lcom4_score"),
-                        "MaintainabilityIndex": builtin_analysis_result.get("MaintainabilityIndex"),
-                        "CyclomaticComplexity": builtin_analysis_result.get("CyclomaticComplexity"),
-                        "ClassCoupling": builtin_analysis_result.get("ClassCoupling"),
-                        "SourceLines": builtin_analysis_result.get("SourceLines")
-                    }
+                commit = repo.tags[tag_name].commit.hexsha
             except Exception as e:
-                print(f"⚠️ Error analyzing commit {commit} in {repo_url}: {e}")
+                print(f"⚠️ Error reading tag '{tag_name}' in {repo_url}: {e}")
+                continue
+
+            key = make_job_key(f"{repo_url}#{tag_name}", commit, fingerprint)
+            # Every tag is diffed against the previous one, whose result is reused from the result cache
+            jobs[key] = (repo_path, commit, repo_url, base_commit_sha if INCREMENTAL else None)
+            tag_indices[key] = i
+            base_commit_sha = commit
+
+        def make_tag_row(key, result):
+            index = tag_indices[key]
+            # Repositories of different owners or hosts can share a name, the URL identifies them
+            return make_row("public", "public", repo_url, result, jobs[key][1], tag_list[index], index)
+
+        def save_checkpoint(key, result):
+            results[project_id][tag_indices[key]] = result
+            store_rows([make_tag_row(key, result)])
+
+        # Incremental analysis needs the previous tag's result, so the tags are analyzed in order
+        workers = 1 if INCREMENTAL else WORKERS
+        tag_results = run_jobs("public", jobs, analyze_tag_commit, workers, save_checkpoint, on_checkpoint=lambda: save_results(results))
+
+        results[project_id] = {
+            tag_indices[key]: tag_results[key] for key in jobs if tag_results.get(key)
+        }
+        store_rows(make_tag_row(key, tag_results[key]) for key in jobs if tag_results.get(key))
+
+        prune_worktrees()
 
     # Save results
-    with open("public_analysis_results.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4)
+    save_results(results)
+    finish_run()
 
 if __name__ == "__main__":
     analyze_projects()
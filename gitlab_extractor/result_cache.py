@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import git
+import yaml
+from glob import glob
+from contextlib import contextmanager
+from profiler import count
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+CACHE_CONFIG = config.get("cache", {})
+CACHE_ENABLED = CACHE_CONFIG.get("enabled", True)
+CACHE_PATH = CACHE_CONFIG.get("path", "./cache/results.sqlite")
+CACHE_MAX_SIZE_MB = CACHE_CONFIG.get("max_size_mb", 512)
+ANALYZER_DIR = config["analyzer"]["project_dir"]
+
+
+@contextmanager
+def open_cache():
+    """Open the cache database in a transaction, creating it if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(CACHE_PATH)), exist_ok=True)
+    connection = sqlite3.connect(CACHE_PATH, timeout=60)
+    connection.execute(
+        """CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            commit_sha TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )"""
+    )
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def get_commit_sha(repo_path):
+    """Return the hexsha of the commit checked out in the given repository."""
+    try:
+        return git.Repo(repo_path).head.commit.hexsha
+    except Exception:
+        return None
+
+
+def get_tree_hash(repo_path):
+    """Return the hexsha of the tree checked out in the given repository, shared by commits with the same files."""
+    try:
+        return git.Repo(repo_path).head.commit.tree.hexsha
+    except Exception:
+        return None
+
+
+def get_analyzer_fingerprint():
+    """Hash the analyzer configuration and the built analyzer assemblies."""
+    hasher = hashlib.sha256()
+
+    with open(os.path.join(ANALYZER_DIR, "appsettings.json"), "rb") as f:
+        hasher.update(f.read())
+
+    for assembly in sorted(glob(os.path.join(ANALYZER_DIR, "bin", "**", "CodeMetricsAnalyzer*.dll"), recursive=True)):
+        with open(assembly, "rb") as f:
+            hasher.update(f.read())
+
+    return hasher.hexdigest()
+
+
+def make_key(kind, commit_sha, fingerprint):
+    """Build the content address of a cached result."""
+    return hashlib.sha256(f"{kind}:{commit_sha}:{fingerprint}".encode()).hexdigest()
+
+
+def get_cached_result(kind, commit_sha, fingerprint=""):
+    """Look up a cached result, returns None on a miss."""
+    if not CACHE_ENABLED or not commit_sha:
+        return None
+
+    key = make_key(kind, commit_sha, fingerprint)
+    with open_cache() as connection:
+        row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            count("cache_misses")
+            return None
+        connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+
+    count("cache_hits")
+
+    return json.loads(row[0])
+
+
+def store_result(kind, commit_sha, value, fingerprint=""):
+    """Store a result in the cache and evict old entries above the size budget."""
+    if not CACHE_ENABLED or not commit_sha or value is None:
+        return
+
+    key = make_key(kind, commit_sha, fingerprint)
+    serialized = json.dumps(value)
+    with open_cache() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO results (key, kind, commit_sha, value, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, commit_sha, serialized, len(serialized), time.time())
+        )
+        evict(connection)
+
+
+def evict(connection):
+    """Delete the least recently used entries until the cache fits into its size budget."""
+    if not CACHE_MAX_SIZE_MB:
+        return
+
+    max_size = CACHE_MAX_SIZE_MB * 1024 * 1024
+    total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+    if total_size <= max_size:
+        return
+
+    stale_keys = []
+    for key, size in connection.execute("SELECT key, size FROM results ORDER BY last_used ASC"):
+        if total_size <= max_size:
+            break
+        stale_keys.append((key,))
+        total_size -= size
+
+    connection.executemany("DELETE FROM results WHERE key = ?", stale_keys)
@@ -0,0 +1,146 @@
+import os
+import time
+import sqlite3
+import yaml
+from contextlib import contextmanager
+
+# === Load Configuration ===
+# The notebooks import the loader from visualization/, which has no config.yml
+config = {}
+if os.path.exists("config.yml"):
+    with open("config.yml", "r") as file:
+        config = yaml.safe_load(file)
+
+# === Configuration ===
+STORE_CONFIG = config.get("results_store", {})
+STORE_PATH = STORE_CONFIG.get("path", "./results/results.sqlite")
+WRITE_JSON = STORE_CONFIG.get("write_json", True)  # Keep writing the JSON result files next to the store
+
+COUNT_COLUMNS = [  # Diagnostics reported per repository and line counts summed over its projects
+    "bumpy_score",
+    "fpc_score",
+    "lcom4_score",
+    "lcom5_score",
+    "SourceLines",
+    "ExecutableLines",
+]
+AVERAGE_COLUMNS = [  # Built-in metrics averaged over the projects of a solution
+    "MaintainabilityIndex",
+    "CyclomaticComplexity",
+    "ClassCoupling",
+    "DepthOfInheritance",
+]
+METRIC_COLUMNS = [*COUNT_COLUMNS, *AVERAGE_COLUMNS]
+COLUMN_TYPES = {
+    "source": "TEXT NOT NULL",
+    "run": "TEXT NOT NULL",
+    "repo": "TEXT NOT NULL",
+    "commit_sha": "TEXT",
+    "label": "TEXT",
+    "position": "INTEGER",
+    "threshold": "INTEGER",
+    "recorded_at": "REAL NOT NULL",
+    **{column: "INTEGER" for column in COUNT_COLUMNS},
+    **{column: "REAL" for column in AVERAGE_COLUMNS},
+}
+COLUMNS = list(COLUMN_TYPES)
+
+
+@contextmanager
+def open_store(path=None):
+    """Open the results database in a transaction, creating it if needed."""
+    path = path or STORE_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=60)
+    column_definitions = ", ".join(f"{column} {column_type}" for column, column_type in COLUMN_TYPES.items())
+    connection.execute(f"CREATE TABLE IF NOT EXISTS results ({column_definitions})")
+    migrate_column_types(connection, column_definitions)
+    # A job analyzed again replaces its row, NULL labels and thresholds would never collide otherwise
+    connection.execute(
+        """CREATE UNIQUE INDEX IF NOT EXISTS results_key
+           ON results (source, run, repo, IFNULL(label, ''), IFNULL(threshold, -1))"""
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS results_repo ON results (source, repo)")
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def migrate_column_types(connection, column_definitions):
+    """Recreate a results table of an older version whose column types differ, keeping its rows."""
+    declared_types = {name: column_type for _, name, column_type, *_ in connection.execute("PRAGMA table_info(results)")}
+    if all(declared_types.get(column) == column_type.split()[0] for column, column_type in COLUMN_TYPES.items()):
+        return
+
+    columns = ", ".join(column for column in COLUMN_TYPES if column in declared_types)
+    with connection:
+        connection.execute("DROP INDEX IF EXISTS results_key")
+        connection.execute("DROP INDEX IF EXISTS results_repo")
+        connection.execute("ALTER TABLE results RENAME TO results_old")
+        connection.execute(f"CREATE TABLE results ({column_definitions})")
+        connection.execute(f"INSERT INTO results ({columns}) SELECT {columns} FROM results_old")
+        connection.execute("DROP TABLE results_old")
+
+
+def make_row(source, run_name, repo, result, commit_sha=None, label=None, position=None, threshold=None):
+    """Build a typed row from a result dict, metrics missing from the result are stored as NULL."""
+    row = {
+        "source": source,
+        "run": run_name,
+        "repo": str(repo),
+        "commit_sha": commit_sha,
+        "label": label,
+        "position": position,
+        "threshold": threshold,
+        "recorded_at": time.time(),
+    }
+    row.update({column: result.get(column) for column in METRIC_COLUMNS})
+    return row
+
+
+def store_rows(rows, path=None):
+    """Insert result rows, replacing earlier rows of the same run, repo, label and threshold."""
+    rows = list(rows)
+    if not rows:
+        return
+
+    columns = list(rows[0])
+    with open_store(path) as connection:
+        connection.executemany(
+            f"INSERT OR REPLACE INTO results ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [tuple(row[column] for column in columns) for row in rows]
+        )
+
+
+def load_results(source=None, runs=None, repos=None, thresholds=None, columns=None, path=None):
+    """Load results into a DataFrame, filtering in SQLite so only the requested rows and columns are read.
+
+    Every filter takes a single value or a list, e.g. load_results("public", columns=["repo", "position",
+    "bumpy_score"]) or load_results("threshold", thresholds=[3, 4]).
+    """
+    unknown_columns = set(columns or []) - set(COLUMNS)
+    if unknown_columns:
+        raise ValueError(f"Unknown result columns: {', '.join(sorted(unknown_columns))}")
+
+    filters = []
+    parameters = []
+    for column, values in (("source", source), ("run", runs), ("repo", repos), ("threshold", thresholds)):
+        if values is None:
+            continue
+        values = [values] if isinstance(values, (str, int)) else list(values)
+        filters.append(f"{column} IN ({', '.join('?' for _ in values)})")
+        parameters.extend(str(value) if column == "repo" else value for value in values)
+
+    selected = ", ".join(columns) if columns else "*"
+    query = f"SELECT {selected} FROM results"
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    query += " ORDER BY source, run, repo, position, threshold"
+
+    # Only the notebooks load results, the analysis runs do not need pandas
+    import pandas as pd
+
+    with open_store(path) as connection:
+        return pd.read_sql_query(query, connection, params=parameters)
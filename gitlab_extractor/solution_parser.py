@@ -0,0 +1,91 @@
+import os
+import re
+import subprocess
+import xml.etree.ElementTree as ET
+
+# Project("{type guid}") = "Name", "relative\path\Name.csproj", "{project guid}"
+SLN_PROJECT_PATTERN = re.compile(r'^Project\("\{[^}]+\}"\)\s*=\s*"[^"]*"\s*,\s*"([^"]+)"', re.MULTILINE)
+
+SOLUTION_EXTENSIONS = (".sln", ".slnx")
+# Build output, dependencies and Unity's caches never hold the solution of a repository
+PRUNED_DIRS = {".git", ".vs", "bin", "obj", "node_modules", "packages", "Library", "Temp", "Logs"}
+
+
+def get_solution_projects(solution_path, extension=".csproj"):
+    """List the absolute paths of the projects of a .sln or .slnx solution."""
+    solution_dir = os.path.dirname(os.path.abspath(solution_path))
+
+    if solution_path.endswith(".slnx"):
+        root = ET.parse(solution_path).getroot()
+        project_paths = [project.attrib.get("Path", "") for project in root.iter("Project")]
+    else:
+        with open(solution_path, "r", encoding="utf-8-sig", errors="ignore") as f:
+            project_paths = SLN_PROJECT_PATTERN.findall(f.read())
+
+    projects = []
+    for project_path in project_paths:
+        # Solution files always use Windows separators
+        project_path = project_path.replace("\\", "/")
+        if project_path.endswith(extension):
+            projects.append(os.path.normpath(os.path.join(solution_dir, project_path)))
+    return projects
+
+
+def get_project_references(project_path):
+    """List the absolute paths of the projects referenced by a project file with <ProjectReference>."""
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    references = []
+    for element in ET.parse(project_path).getroot().iter():
+        # Old style project files put every element into the MSBuild namespace
+        if element.tag.rsplit("}", 1)[-1] == "ProjectReference" and element.attrib.get("Include"):
+            reference = element.attrib["Include"].replace("\\", "/")
+            references.append(os.path.normpath(os.path.join(project_dir, reference)))
+    return references
+
+
+def list_tracked_solutions(repo_path):
+    """List the solutions tracked by git relative to repo_path, None outside of a git checkout."""
+    try:
+        output = subprocess.run(
+            ["git", "-C", repo_path, "ls-files", "-z", "--", *(f"*{extension}" for extension in SOLUTION_EXTENSIONS)],
+            check=True, capture_output=True, text=True
+        ).stdout
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    return [path for path in output.split("\0") if path]
+
+
+def scan_solutions(repo_path):
+    """Find the solutions below repo_path with a directory walk that skips build output and dependencies."""
+    solutions = []
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [directory for directory in dirs if directory not in PRUNED_DIRS]
+        solutions.extend(
+            os.path.relpath(os.path.join(root, file), repo_path) for file in files if file.endswith(SOLUTION_EXTENSIONS)
+        )
+    return solutions
+
+
+def count_solution_projects(solution_path):
+    """Number of C# projects of a solution, 0 if it cannot be read."""
+    try:
+        return len(get_solution_projects(solution_path))
+    except (OSError, ET.ParseError):
+        return 0
+
+
+def rank_solutions(repo_path, solutions):
+    """Order solutions by preference: closest to the root first, then most projects, then by path."""
+    def get_rank(solution):
+        solution = solution.replace("\\", "/")
+        return solution.count("/"), -count_solution_projects(os.path.join(repo_path, solution)), solution
+
+    return sorted(solutions, key=get_rank)
+
+
+def discover_solutions(repo_path):
+    """List the solutions of a checkout from the git index, or a pruned directory walk, best candidate first."""
+    solutions = list_tracked_solutions(repo_path)
+    if solutions is None:
+        solutions = scan_solutions(repo_path)
+    return rank_solutions(repo_path, solutions)
@@ -0,0 +1,111 @@
+import os
+import sys
+import shutil
+import importlib
+
+import pytest
+
+EXTRACTOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UNITY_PACKAGE_PROJECT = """<Project ToolsVersion="4.0">
+  <ItemGroup>
+    <Compile Include="Library\\PackageCache\\com.unity.textmeshpro@3.0.6\\Scripts\\Runtime\\TMP_Text.cs" />
+  </ItemGroup>
+  <ItemGroup>
+    <Reference Include="UnityEngine">
+      <HintPath>{root}/Library/ScriptAssemblies/UnityEngine.UI.dll</HintPath>
+    </Reference>
+  </ItemGroup>
+</Project>
+"""
+ASSEMBLY_CSHARP_PROJECT = """<Project ToolsVersion="4.0">
+  <ItemGroup>
+    <Compile Include="Assets\\Scripts\\Player.cs" />
+  </ItemGroup>
+  <ItemGroup>
+    <ProjectReference Include="Unity.TextMeshPro.csproj" />
+  </ItemGroup>
+</Project>
+"""
+
+
+@pytest.fixture
+def unity_solution(tmp_path, monkeypatch):
+    """Import unity_solution with the example configuration and a temporary cache directory."""
+    shutil.copy(os.path.join(EXTRACTOR_DIR, "config.example.yml"), tmp_path / "config.yml")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(EXTRACTOR_DIR)
+    sys.modules.pop("unity_solution", None)
+    module = importlib.import_module("unity_solution")
+    monkeypatch.setattr(module, "UNITY_CACHE_DIR", str(tmp_path / "cache"))
+    return module
+
+
+def write(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def make_checkout(path):
+    """A checkout as git would create it: scripts and settings, no Library."""
+    write(os.path.join(path, "ProjectSettings", "ProjectVersion.txt"), "m_EditorVersion: 6000.0.43f1\n")
+    write(os.path.join(path, "ProjectSettings", "ProjectSettings.asset"), "scriptingDefineSymbols: {}\n")
+    write(os.path.join(path, "Packages", "manifest.json"), '{"dependencies": {"com.unity.textmeshpro": "3.0.6"}}')
+    write(os.path.join(path, "Assets", "Scripts", "Player.cs"), "class Player {}")
+
+
+def generate_like_unity(path):
+    """Write what opening the checkout in Unity leaves behind: Library artifacts and the generated projects."""
+    root = os.path.abspath(path)
+    write(os.path.join(path, "Library", "PackageCache", "com.unity.textmeshpro@3.0.6", "Scripts", "Runtime", "TMP_Text.cs"), "class TMP_Text {}")
+    write(os.path.join(path, "Library", "ScriptAssemblies", "UnityEngine.UI.dll"), "dll")
+    write(os.path.join(path, "Unity.TextMeshPro.csproj"), UNITY_PACKAGE_PROJECT.format(root=root))
+    write(os.path.join(path, "Assembly-CSharp.csproj"), ASSEMBLY_CSHARP_PROJECT)
+    write(os.path.join(path, "project.sln"), "Microsoft Visual Studio Solution File, Format Version 12.00\n")
+
+
+def test_restore_brings_back_the_referenced_package_cache(unity_solution, tmp_path):
+    generated = str(tmp_path / "generated")
+    fresh = str(tmp_path / "fresh")
+    make_checkout(generated)
+    make_checkout(fresh)
+    generate_like_unity(generated)
+
+    cache_key = unity_solution.get_unity_cache_key(generated, unity_solution.list_unity_files(generated))
+    unity_solution.store_unity_solution(generated, cache_key)
+
+    assert unity_solution.restore_unity_solution(fresh, cache_key)
+    assert os.path.isfile(os.path.join(fresh, "Library", "PackageCache", "com.unity.textmeshpro@3.0.6", "Scripts", "Runtime", "TMP_Text.cs"))
+    assert os.path.isfile(os.path.join(fresh, "Library", "ScriptAssemblies", "UnityEngine.UI.dll"))
+    with open(os.path.join(fresh, "Unity.TextMeshPro.csproj"), encoding="utf-8") as f:
+        content = f.read()
+    assert os.path.abspath(fresh) in content and os.path.abspath(generated) not in content
+
+
+def test_restore_fails_when_a_referenced_file_is_missing(unity_solution, tmp_path):
+    generated = str(tmp_path / "generated")
+    fresh = str(tmp_path / "fresh")
+    make_checkout(generated)
+    make_checkout(fresh)
+    generate_like_unity(generated)
+    os.remove(os.path.join(fresh, "Assets", "Scripts", "Player.cs"))
+
+    cache_key = unity_solution.get_unity_cache_key(generated, unity_solution.list_unity_files(generated))
+    unity_solution.store_unity_solution(generated, cache_key)
+
+    assert not unity_solution.restore_unity_solution(fresh, cache_key)
+
+
+def test_cache_key_covers_project_settings_and_package_lock(unity_solution, tmp_path):
+    checkout = str(tmp_path / "checkout")
+    make_checkout(checkout)
+    keys = [unity_solution.get_unity_cache_key(checkout, unity_solution.list_unity_files(checkout))]
+
+    write(os.path.join(checkout, "ProjectSettings", "ProjectSettings.asset"), "scriptingDefineSymbols: {1: ENABLE_X}\n")
+    keys.append(unity_solution.get_unity_cache_key(checkout, unity_solution.list_unity_files(checkout)))
+
+    write(os.path.join(checkout, "Packages", "packages-lock.json"), '{"dependencies": {}}')
+    keys.append(unity_solution.get_unity_cache_key(checkout, unity_solution.list_unity_files(checkout)))
+
+    assert len(set(keys)) == 3
@@ -1,8 +1,13 @@
+import numpy as np
 import yaml
 import json
 import os
 from milestone_commit_finder import get_projects, get_subgroups
-from analyzer import clone_repo, run_analyzers, checkout_commit
+from analyzer import clone_repo, run_analyzers, checkout_commit, collect_metric_values, build_analyzer, get_job_fingerprint
+from clone_manager import clone_all
+from result_cache import get_commit_sha
+from job_queue import run_jobs, get_results, make_job_key
+from results_store import make_row, store_rows, WRITE_JSON
 
 # === Load Configuration ===
 with open("config.yml", "r") as file:
@@ -14,6 +19,8 @@ GROUP_ID = config["gitlab"]["group_id"] + ("%2f" + config["gitlab"]["subgroup_id
 TOKEN = config["gitlab"]["token"]  # GitLab API token with read_repository permission
 ANALYZER_DIR = config["analyzer"]["project_dir"]
 THRESHOLDS = list(range(1,10))
+SWEEP = config.get("threshold_analyzer", {}).get("sweep", True)  # analyze once and evaluate every threshold afterwards
+SWEEP_THRESHOLD = -1  # below every metric value, so each analyzed symbol is reported together with its value
 
 HEADERS = {"PRIVATE-TOKEN": TOKEN}
 
@@ -21,6 +28,8 @@ def get_all_projects():
     """Get all projects."""
 
     subgroup_ids = get_subgroups(GROUP_ID)
+    if subgroup_ids is None:
+        raise RuntimeError(f"Could not list the subgroups of {GROUP_ID}")
     if not subgroup_ids:
         subgroup_ids.append(GROUP_ID)
 
@@ -30,57 +39,212 @@ def get_all_projects():
         print(f"Get projects for {subgroup_id}...")
 
         # Get projects inside this subgroup and its direct subgroups
-        projects += get_projects(subgroup_id)
+        subgroup_projects = get_projects(subgroup_id)
+        if subgroup_projects is None:
+            print(f"❌ Skipping subgroup {subgroup_id}, its projects could not be listed")
+            continue
+        projects += subgroup_projects
 
     return projects
    
+def get_score_thresholds(threshold):
+    """Map a threshold level to the threshold of each metric."""
+    return {
+        "bumpy_score": threshold,
+        "fpc_score": threshold,
+        "lcom4_score": threshold,
+        "lcom5_score": threshold / 10, # normalize value beetween 0 and 1
+    }
+
 def update_config(new_threshold):
     """Update the JSON config file with the given threshold."""
     config_path = os.path.join(ANALYZER_DIR, "appsettings.json")
     with open(config_path, "r", encoding="utf8") as f:
         conf = json.load(f)
 
-    conf["BumpyRoadAnalysis"]["BumpynessThreshold"] = new_threshold
-    conf["FunctionParameterCountAnalysis"]["ParameterCountThreshold"] = new_threshold
-    conf["LCOM5Analysis"]["CohesionThreshold"] = new_threshold / 10 # normalize value beetween 0 and 1
-    conf["LCOM4Analysis"]["CohesionThreshold"] = new_threshold
+    score_thresholds = get_score_thresholds(new_threshold)
+    conf["BumpyRoadAnalysis"]["BumpynessThreshold"] = score_thresholds["bumpy_score"]
+    conf["FunctionParameterCountAnalysis"]["ParameterCountThreshold"] = score_thresholds["fpc_score"]
+    conf["LCOM5Analysis"]["CohesionThreshold"] = score_thresholds["lcom5_score"]
+    conf["LCOM4Analysis"]["CohesionThreshold"] = score_thresholds["lcom4_score"]
 
     with open(config_path, "w", encoding="utf8") as f:
         json.dump(conf, f, indent=4)
 
+def store_results(threshold, results, head_commits):
+    """Save the results of a threshold into the results store, with the commit each project was analyzed at."""
+    store_rows(
+        make_row("threshold", "threshold", project, result, head_commits.get(project), threshold=threshold)
+        for project, result in results.items()
+    )
+
+def save_results(threshold, results):
+    """Save the results of a threshold into the threshold analysis directory."""
+    if not WRITE_JSON:
+        return
+
+    # Define directory and file path
+    results_dir = "threshold_analysis_data"
+    results_file = f"analysis_results_{threshold}.json"
+
+    # Ensure the directory exists
+    os.makedirs(results_dir, exist_ok=True)
+
+    # Save results
+    with open(os.path.join(results_dir, results_file), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+def get_head_commits(projects):
+    """Clone or fetch all projects in parallel and return the commit each of them is analyzed at."""
+    repo_paths = clone_all(clone_repo, projects)
+    return {project: get_commit_sha(repo_path) if repo_path else None for project, repo_path in zip(projects, repo_paths)}
+
+def make_threshold_jobs(projects, head_commits):
+    """One job per project, commit and analyzer configuration."""
+    fingerprint = get_job_fingerprint()
+    return {
+        make_job_key(str(project), head_commits[project], fingerprint): (project, head_commits[project])
+        for project in projects
+    }
+
+def count_diagnostics(metric_values):
+    """Count the diagnostics reported at every threshold from the raw metric values."""
+    counts = {}
+    for score, values in metric_values.items():
+        sorted_values = np.sort(np.asarray(values, dtype=float))
+        limits = np.array([get_score_thresholds(threshold)[score] for threshold in THRESHOLDS], dtype=float)
+        # A diagnostic is reported when the value is strictly above the threshold
+        counts[score] = len(sorted_values) - np.searchsorted(sorted_values, limits, side="right")
+
+    return counts
+
+def sweep_project(project, commit_sha=None):
+    """Collect the metric values of a project once and count its diagnostics at every threshold."""
+    # The commit of the job is already in the clone, nothing is fetched
+    repo_path = clone_repo(project, [commit_sha] if commit_sha else None)
+    if not repo_path:
+        return None
+
+    metric_values = collect_metric_values(repo_path)
+    if not metric_values:
+        return None
+
+    counts = count_diagnostics(metric_values)
+    return {score: [int(count) for count in score_counts] for score, score_counts in counts.items()}
+
+def collect_sweep_results(project_counts):
+    """Build the results of every threshold from the diagnostic counts of the projects."""
+    results = {threshold: {} for threshold in THRESHOLDS}
+    for project, counts in project_counts.items():
+        if not counts:
+            continue
+        for i, threshold in enumerate(THRESHOLDS):
+            results[threshold][project] = {
+                "project_id": project,
+                "bumpy_score": counts["bumpy_score"][i],
+                "fpc_score": counts["fpc_score"][i],
+                "lcom4_score": counts["lcom4_score"][i],
+                "lcom5_score": counts["lcom5_score"][i]
+            }
+    return results
+
+def sweep_projects():
+    """Analyze all projects once and evaluate every threshold on the collected metric values"""
+    projects = get_all_projects()
+    head_commits = get_head_commits(projects)
+
+    config_path = os.path.join(ANALYZER_DIR, "appsettings.json")
+    with open(config_path, "r", encoding="utf8") as f:
+        original_config = f.read()
+
+    def collect_project_counts(job_results):
+        return {project: job_results[key] for key, (project, _) in jobs.items() if job_results.get(key)}
+
+    def save_checkpoint(key, result):
+        finished[key] = result
+        project_results = collect_sweep_results({jobs[key][0]: result})
+        for threshold in THRESHOLDS:
+            store_results(threshold, project_results[threshold], head_commits)
+
+    def write_checkpoint():
+        results = collect_sweep_results(collect_project_counts(finished))
+        for threshold in THRESHOLDS:
+            save_results(threshold, results[threshold])
+
+    update_config(SWEEP_THRESHOLD)
+    build_analyzer()
+    try:
+        # One job per project, its row of every threshold is stored as soon as it is finished
+        jobs = make_threshold_jobs(projects, head_commits)
+        finished = get_results("threshold_sweep", set(jobs))
+        project_counts = collect_project_counts(
+            run_jobs("threshold_sweep", jobs, sweep_project, on_result=save_checkpoint, on_checkpoint=write_checkpoint)
+        )
+    finally:
+        with open(config_path, "w", encoding="utf8") as f:
+            f.write(original_config)
+        build_analyzer()
+
+    results = collect_sweep_results(project_counts)
+    for threshold in THRESHOLDS:
+        # Also stores the results finished by an earlier, killed run
+        store_results(threshold, results[threshold], head_commits)
+        save_results(threshold, results[threshold])
+
+def analyze_threshold_project(project, commit_sha=None):
+    """Analyze a project with the currently configured threshold."""
+    # The commit of the job is already in the clone, nothing is fetched
+    repo_path = clone_repo(project, [commit_sha] if commit_sha else None)
+    if not repo_path:
+        return None
+
+    analysis_result = run_analyzers(repo_path)
+    if not analysis_result:
+        return None
+
+    return {
+        "project_id": project,
+        "bumpy_score": analysis_result["bumpy_score"],
+        "fpc_score": analysis_result["fpc_score"],
+        "lcom4_score": analysis_result["lcom4_score"],
+        "lcom5_score": analysis_result["lcom5_score"]
+    }
+
 def analyze_projects():
     """Analyze all projects with different thresholds"""
+    if SWEEP:
+        sweep_projects()
+        return
+
     projects = get_all_projects()
+    head_commits = get_head_commits(projects)
 
     for threshold in THRESHOLDS:
         print(f"Checking threshold {threshold}...")
         update_config(threshold)
+        build_analyzer()
+
+        run_name = f"threshold_{threshold}"
+        jobs = make_threshold_jobs(projects, head_commits)
+        finished = get_results(run_name, set(jobs))
 
-        results = {}
+        def collect_results(job_results):
+            return {project: job_results[key] for key, (project, _) in jobs.items() if job_results.get(key)}
 
-        for project in projects:
-            repo_path = clone_repo(project)
-            analysis_result = run_analyzers(repo_path)
-            if (analysis_result):
-                results[project] = {
-                    "project_id": project,
-                    "bumpy_score": analysis_result["bumpy_score"],
-                    "fpc_score": analysis_result["fpc_score"],
-                    "lcom4_score": analysis_result["lcom4_score"],
-                    "lcom5_score": analysis_result["lcom5_score"]
-                }
+        def save_checkpoint(key, result):
+            finished[key] = result
+            store_results(threshold, {jobs[key][0]: result}, head_commits)
 
-        # Define directory and file path
-        results_dir = "threshold_analysis_data"
-        results_file = f"analysis_results_{threshold}.json"
+        def write_checkpoint():
+            save_results(threshold, collect_results(finished))
 
-        # Ensure the directory exists
-        os.makedirs(results_dir, exist_ok=True)
+        results = collect_results(
+            run_jobs(run_name, jobs, analyze_threshold_project, on_result=save_checkpoint, on_checkpoint=write_checkpoint)
+        )
 
-        # Save results
-        with open(os.path.join(results_dir, results_file), "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=4)
+        store_results(threshold, results, head_commits)
+        save_results(threshold, results)
 
 
 if __name__ == "__main__":
-    analyze_projects()
\ No newline at end of file
+    analyze_projects()
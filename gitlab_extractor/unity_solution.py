@@ -0,0 +1,372 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import uuid
+import subprocess
+import yaml
+from xml.sax.saxutils import escape
+from solution_parser import PRUNED_DIRS
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+UNITY_PATH = config["analyzer"]["unity_path"]
+UNITY_VERSION = config["analyzer"]["unity_version"]
+UNITY_CACHE_DIR = config["analyzer"].get("unity_cache_dir", "./cache/unity")  # Solutions generated by Unity, per project layout
+UNITY_GENERATOR = config["analyzer"].get("unity_generator", "unity")  # "unity" = Unity editor, "asmdef" = without Unity
+UNITY_MANAGED_DIR = config["analyzer"].get("unity_managed_dir", "")  # optional, UnityEngine assemblies for the asmdef generator
+
+PROJECT_ROOT_TOKEN = "$(UnityProjectRoot)"  # Stands for the checkout in cached project files
+CSHARP_PROJECT_TYPE = "{FAE04EC0-301F-11D3-BF4B-00C04F79EFBC}"
+SOLUTION_CONFIGURATIONS = ("Debug", "Release")
+LAYOUT_FILES = (  # Files besides the scripts and assembly definitions that Unity writes into the projects
+    "Packages/manifest.json",
+    "Packages/packages-lock.json",
+    "ProjectSettings/ProjectSettings.asset",  # Scripting define symbols and API compatibility level
+)
+# Files referenced by generated projects: <Compile Include="..."/>, <None Include="..."/>, <HintPath>...</HintPath>
+REFERENCE_PATTERN = re.compile(r'<(?:Compile|None|Analyzer|Reference)\s+Include="([^"]+)"|<HintPath>([^<]+)</HintPath>')
+FIRSTPASS_DIRS = ("Plugins", "Standard Assets", "Pro Standard Assets")  # Compiled before the other scripts of Assets
+
+
+def is_unity_project(repo_path):
+    """Check whether a checkout is a Unity project."""
+    return os.path.exists(os.path.join(repo_path, "ProjectSettings", "ProjectVersion.txt"))
+
+
+def list_unity_files(repo_path):
+    """List the scripts, assembly definitions and layout files of a Unity project, relative and with / separators."""
+    try:
+        output = subprocess.run(
+            ["git", "-C", repo_path, "ls-files", "-z", "--", "Assets", "Packages", *LAYOUT_FILES],
+            check=True, capture_output=True, text=True
+        ).stdout
+        files = [path for path in output.split("\0") if path]
+    except (subprocess.CalledProcessError, OSError):
+        files = []
+        for directory in ("Assets", "Packages"):
+            for root, dirs, names in os.walk(os.path.join(repo_path, directory)):
+                dirs[:] = [name for name in dirs if name not in PRUNED_DIRS]
+                files.extend(os.path.relpath(os.path.join(root, name), repo_path).replace(os.sep, "/") for name in names)
+        files.extend(path for path in LAYOUT_FILES if os.path.isfile(os.path.join(repo_path, path)))
+
+    return sorted({
+        path for path in files
+        if path.endswith((".cs", ".asmdef", ".asmref", ".asmdef.meta")) or path in LAYOUT_FILES
+    })
+
+
+def get_unity_cache_key(repo_path, files):
+    """Hash everything the generated projects depend on: Unity version, packages, project settings, assembly
+    definitions and the list of scripts."""
+    hasher = hashlib.sha256(UNITY_VERSION.encode())
+    for path in files:
+        hasher.update(path.encode() + b"\0")
+        # Script contents do not change the project files, only their list does
+        if not path.endswith(".cs"):
+            with open(os.path.join(repo_path, path), "rb") as f:
+                hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def list_generated_files(repo_path):
+    """The solution and project files Unity writes into the project root."""
+    return [name for name in os.listdir(repo_path) if name.endswith((".sln", ".csproj"))]
+
+
+def get_root_variants(repo_path):
+    """Spellings of the checkout path that can appear in generated project files."""
+    root = os.path.abspath(repo_path)
+    return sorted({root, root.replace("\\", "/"), root.replace("/", "\\")}, key=len, reverse=True)
+
+
+def get_referenced_paths(content, repo_path):
+    """Absolute paths of the files a generated project or solution refers to, MSBuild expressions are skipped."""
+    paths = []
+    for include, hint_path in REFERENCE_PATTERN.findall(content):
+        path = include or hint_path
+        if "$(" in path or "*" in path or not re.search(r"[\\/]", path):
+            continue  # Properties, wildcards and references by assembly name
+        paths.append(os.path.normpath(os.path.join(os.path.abspath(repo_path), path.replace("\\", "/"))))
+    return paths
+
+
+def get_library_paths(content, repo_path):
+    """Referenced files inside the project's Library directory (PackageCache sources, ScriptAssemblies), relative."""
+    library_dir = os.path.join(os.path.abspath(repo_path), "Library")
+    return sorted({
+        os.path.relpath(path, repo_path) for path in get_referenced_paths(content, repo_path)
+        if path.startswith(library_dir + os.sep) and os.path.isfile(path)
+    })
+
+
+def store_unity_solution(repo_path, cache_key):
+    """Keep the solution and projects generated by Unity, with the checkout path replaced by a token.
+
+    The files they reference in Library (package sources, compiled assemblies) only exist in a checkout Unity
+    has opened, so they are kept as well.
+    """
+    generated_files = list_generated_files(repo_path)
+    if not generated_files:
+        return
+
+    cache_path = os.path.join(UNITY_CACHE_DIR, cache_key)
+    temp_path = f"{cache_path}.tmp{os.getpid()}"
+    os.makedirs(temp_path, exist_ok=True)
+    library_paths = set()
+    for name in generated_files:
+        with open(os.path.join(repo_path, name), "r", encoding="utf-8-sig", errors="replace") as f:
+            content = f.read()
+        library_paths.update(get_library_paths(content, repo_path))
+        for root in get_root_variants(repo_path):
+            content = content.replace(root, PROJECT_ROOT_TOKEN)
+        with open(os.path.join(temp_path, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    for path in library_paths:
+        os.makedirs(os.path.dirname(os.path.join(temp_path, path)), exist_ok=True)
+        shutil.copy2(os.path.join(repo_path, path), os.path.join(temp_path, path))
+
+    if os.path.exists(cache_path):
+        shutil.rmtree(temp_path, ignore_errors=True)  # Another worker stored the same layout first
+    else:
+        os.replace(temp_path, cache_path)
+
+
+def restore_unity_solution(repo_path, cache_key):
+    """Write the cached projects of an identical layout and their Library files into the checkout.
+
+    Returns False on a cache miss or when a referenced file is still missing afterwards, Unity has to
+    generate the solution then.
+    """
+    cache_path = os.path.join(UNITY_CACHE_DIR, cache_key)
+    if not os.path.isdir(cache_path):
+        return False
+
+    cached_library = os.path.join(cache_path, "Library")
+    if os.path.isdir(cached_library):
+        shutil.copytree(cached_library, os.path.join(repo_path, "Library"), dirs_exist_ok=True)
+
+    root = os.path.abspath(repo_path)
+    missing_paths = []
+    for name in os.listdir(cache_path):
+        if not os.path.isfile(os.path.join(cache_path, name)):
+            continue
+        with open(os.path.join(cache_path, name), "r", encoding="utf-8") as f:
+            content = f.read().replace(PROJECT_ROOT_TOKEN, root)
+        with open(os.path.join(repo_path, name), "w", encoding="utf-8") as f:
+            f.write(content)
+        missing_paths.extend(path for path in get_referenced_paths(content, repo_path) if not os.path.exists(path))
+
+    if missing_paths:
+        print(f"⚠️ {len(missing_paths)} files referenced by the cached Unity projects are missing, e.g. {missing_paths[0]}")
+        return False
+    return True
+
+
+def read_assembly_definition(repo_path, path):
+    """Read an .asmdef / .asmref file, None if it is not valid JSON."""
+    try:
+        with open(os.path.join(repo_path, path), "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Skipping {path}: {e}")
+        return None
+
+
+def read_meta_guid(repo_path, path):
+    """Read the GUID Unity assigned to an asset from its .meta file."""
+    try:
+        with open(os.path.join(repo_path, f"{path}.meta"), "r", encoding="utf-8-sig") as f:
+            for line in f:
+                if line.startswith("guid:"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def get_default_assembly(path):
+    """Predefined assembly of a script outside of every assembly definition, None for package scripts."""
+    parts = path.split("/")
+    if parts[0] != "Assets":
+        return None  # Unity does not compile package scripts without an assembly definition
+
+    name = "Assembly-CSharp"
+    if "Editor" in parts[1:-1]:
+        name += "-Editor"
+    if len(parts) > 2 and parts[1] in FIRSTPASS_DIRS:
+        name += "-firstpass"
+    return name
+
+
+def get_owner_assembly(path, directory_assemblies):
+    """Assembly of a script: the assembly definition of its closest directory, else a predefined assembly."""
+    directory = os.path.dirname(path)
+    while directory:
+        if directory in directory_assemblies:
+            return directory_assemblies[directory]
+        directory = os.path.dirname(directory)
+    return get_default_assembly(path)
+
+
+def collect_assemblies(repo_path, files):
+    """Group the scripts into assemblies the way Unity compiles them.
+
+    Returns {name: {"scripts", "references", "unsafe"}}, references only name generated assemblies.
+    """
+    definitions = {}
+    guid_names = {}
+    directory_assemblies = {}
+    for path in files:
+        if not path.endswith(".asmdef"):
+            continue
+        definition = read_assembly_definition(repo_path, path)
+        if not definition or not definition.get("name"):
+            continue
+        definitions[definition["name"]] = definition
+        directory_assemblies[os.path.dirname(path)] = definition["name"]
+        guid = read_meta_guid(repo_path, path)
+        if guid:
+            guid_names[guid] = definition["name"]
+
+    def resolve(reference):
+        return guid_names.get(reference[len("GUID:"):]) if reference.startswith("GUID:") else reference
+
+    # An assembly definition reference adds its directory to another assembly
+    for path in files:
+        if path.endswith(".asmref"):
+            definition = read_assembly_definition(repo_path, path)
+            name = resolve((definition or {}).get("reference", ""))
+            if name in definitions:
+                directory_assemblies[os.path.dirname(path)] = name
+
+    assemblies = {}
+    for path in files:
+        if not path.endswith(".cs"):
+            continue
+        name = get_owner_assembly(path, directory_assemblies)
+        if name:
+            assemblies.setdefault(name, {"scripts": [], "references": [], "unsafe": False})["scripts"].append(path)
+
+    for name, definition in definitions.items():
+        if name not in assemblies:
+            continue
+        assemblies[name]["references"] = [
+            reference for reference in map(resolve, definition.get("references", []))
+            if reference in assemblies and reference != name
+        ]
+        assemblies[name]["unsafe"] = bool(definition.get("allowUnsafeCode"))
+
+    # The predefined assemblies see every auto referenced assembly definition and each other in compile order
+    auto_referenced = [
+        name for name, definition in definitions.items() if name in assemblies and definition.get("autoReferenced", True)
+    ]
+    predefined_references = {
+        "Assembly-CSharp-firstpass": [],
+        "Assembly-CSharp-Editor-firstpass": ["Assembly-CSharp-firstpass"],
+        "Assembly-CSharp": ["Assembly-CSharp-firstpass"],
+        "Assembly-CSharp-Editor": ["Assembly-CSharp-firstpass", "Assembly-CSharp-Editor-firstpass", "Assembly-CSharp"],
+    }
+    for name, references in predefined_references.items():
+        if name in assemblies:
+            assemblies[name]["references"] = auto_referenced + [reference for reference in references if reference in assemblies]
+
+    return assemblies
+
+
+def get_managed_dir():
+    """Directory of UnityEngine.dll / UnityEditor.dll, derived from the Unity path unless configured."""
+    if UNITY_MANAGED_DIR:
+        return UNITY_MANAGED_DIR
+    if UNITY_PATH:
+        return os.path.join(os.path.dirname(UNITY_PATH), "Data", "Managed")
+    return ""
+
+
+def get_unity_references():
+    """HintPaths of the Unity engine and editor assemblies, empty if they cannot be found."""
+    managed_dir = get_managed_dir()
+    if not managed_dir or not os.path.isdir(managed_dir):
+        return []
+
+    references = []
+    for directory in (managed_dir, os.path.join(managed_dir, "UnityEngine")):
+        if os.path.isdir(directory):
+            references.extend(
+                os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.startswith(("UnityEngine", "UnityEditor")) and name.endswith(".dll")
+            )
+    return references
+
+
+def generate_project(name, assembly, unity_references):
+    """SDK style project of an assembly; every project of the root gets its own obj and bin directory."""
+    lines = [
+        "<Project>",
+        "  <PropertyGroup>",
+        f"    <BaseIntermediateOutputPath>obj\\{escape(name)}\\</BaseIntermediateOutputPath>",
+        f"    <BaseOutputPath>bin\\{escape(name)}\\</BaseOutputPath>",
+        "  </PropertyGroup>",
+        '  <Import Project="Sdk.props" Sdk="Microsoft.NET.Sdk" />',
+        "  <PropertyGroup>",
+        "    <TargetFramework>netstandard2.1</TargetFramework>",
+        "    <LangVersion>9.0</LangVersion>",
+        f"    <AssemblyName>{escape(name)}</AssemblyName>",
+        "    <EnableDefaultItems>false</EnableDefaultItems>",
+        f"    <AllowUnsafeBlocks>{str(assembly['unsafe']).lower()}</AllowUnsafeBlocks>",
+        "    <DefineConstants>$(DefineConstants);UNITY_EDITOR;UNITY_5_3_OR_NEWER</DefineConstants>",
+        "  </PropertyGroup>",
+        "  <ItemGroup>",
+    ]
+    lines += [f'    <Compile Include="{escape(path.replace("/", chr(92)))}" />' for path in assembly["scripts"]]
+    lines += [f'    <ProjectReference Include="{escape(reference)}.csproj" />' for reference in assembly["references"]]
+    lines += [
+        f'    <Reference Include="{escape(os.path.splitext(os.path.basename(path))[0])}" HintPath="{escape(path)}" Private="false" />'
+        for path in unity_references
+    ]
+    lines += ["  </ItemGroup>", '  <Import Project="Sdk.targets" Sdk="Microsoft.NET.Sdk" />', "</Project>", ""]
+    return "\n".join(lines)
+
+
+def generate_solution(project_names):
+    """Visual Studio solution of the generated projects."""
+    project_guids = {name: "{" + str(uuid.uuid5(uuid.NAMESPACE_URL, name)).upper() + "}" for name in project_names}  # Stable across commits
+    lines = ["", "Microsoft Visual Studio Solution File, Format Version 12.00", "# Visual Studio Version 17"]
+    for name, project_guid in project_guids.items():
+        lines += [f'Project("{CSHARP_PROJECT_TYPE}") = "{name}", "{name}.csproj", "{project_guid}"', "EndProject"]
+    lines += ["Global", "\tGlobalSection(SolutionConfigurationPlatforms) = preSolution"]
+    lines += [f"\t\t{configuration}|Any CPU = {configuration}|Any CPU" for configuration in SOLUTION_CONFIGURATIONS]
+    lines += ["\tEndGlobalSection", "\tGlobalSection(ProjectConfigurationPlatforms) = postSolution"]
+    for project_guid in project_guids.values():
+        for configuration in SOLUTION_CONFIGURATIONS:
+            lines += [
+                f"\t\t{project_guid}.{configuration}|Any CPU.ActiveCfg = {configuration}|Any CPU",
+                f"\t\t{project_guid}.{configuration}|Any CPU.Build.0 = {configuration}|Any CPU",
+            ]
+    lines += ["\tEndGlobalSection", "EndGlobal", ""]
+    return "\r\n".join(lines)
+
+
+def generate_asmdef_solution(repo_path, files):
+    """Write a solution and one project per assembly from the assembly definitions, without starting Unity."""
+    assemblies = collect_assemblies(repo_path, files)
+    if not assemblies:
+        return None
+
+    unity_references = get_unity_references()
+    if not unity_references:
+        print("⚠️ UnityEngine assemblies not found, the generated projects only reference each other.")
+
+    for name, assembly in assemblies.items():
+        with open(os.path.join(repo_path, f"{name}.csproj"), "w", encoding="utf-8") as f:
+            f.write(generate_project(name, assembly, unity_references))
+
+    solution_name = f"{os.path.basename(os.path.abspath(repo_path))}.sln"
+    with open(os.path.join(repo_path, solution_name), "w", encoding="utf-8") as f:
+        f.write(generate_solution(sorted(assemblies)))
+    return solution_name
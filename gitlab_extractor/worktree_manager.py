@@ -0,0 +1,117 @@
+import os
+import shutil
+import git
+import yaml
+from profiler import traced
+
+# === Load Configuration ===
+with open("config.yml", "r") as file:
+    config = yaml.safe_load(file)
+
+# === Configuration ===
+WORKTREE_DIR = config["project"].get("worktree_dir", "./worktrees")
+WORKTREE_MAX_COUNT = config["project"].get("worktree_max_count", 0)  # 0 = unlimited
+WORKTREE_MAX_SIZE_MB = config["project"].get("worktree_max_size_mb", 20480)  # 0 = unlimited
+
+
+def get_worktree_path(repo_path, commit_sha):
+    """Return the directory of the worktree belonging to a (repo, commit) pair."""
+    repo_name = os.path.basename(os.path.normpath(repo_path))
+    return os.path.abspath(os.path.join(WORKTREE_DIR, repo_name, commit_sha))
+
+
+@traced("checkout")
+def checkout_worktree(repo_path, commit_id):
+    """Return a worktree checked out at the given commit, reusing it if it already exists."""
+    repo = git.Repo(repo_path)
+    commit_sha = repo.commit(commit_id).hexsha
+    worktree_path = get_worktree_path(repo_path, commit_sha)
+
+    if os.path.exists(os.path.join(worktree_path, ".git")):
+        try:
+            # Restore tracked files changed by a previous run, build outputs are kept
+            git.Repo(worktree_path).git.reset("--hard", "--quiet")
+            os.utime(worktree_path)
+            print(f"✅ Reusing worktree for commit {commit_sha}")
+            return worktree_path
+        except git.GitCommandError as e:
+            print(f"⚠️ Broken worktree {worktree_path}, recreating it: {e}")
+
+    if os.path.exists(worktree_path):
+        shutil.rmtree(worktree_path, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(worktree_path), exist_ok=True)
+    repo.git.worktree("prune")
+    repo.git.worktree("add", "--detach", "--force", worktree_path, commit_sha)
+    print(f"Checked out commit {commit_sha} into worktree {worktree_path}")
+
+    return worktree_path
+
+
+def remove_worktree(worktree_path):
+    """Delete a worktree directory and unregister it from its repository."""
+    common_dir = None
+    try:
+        common_dir = git.Repo(worktree_path).git.rev_parse("--git-common-dir")
+        common_dir = os.path.join(worktree_path, common_dir)
+    except (git.GitCommandError, git.InvalidGitRepositoryError, git.NoSuchPathError):
+        pass
+
+    shutil.rmtree(worktree_path, ignore_errors=True)
+
+    if common_dir:
+        git.Repo(common_dir).git.worktree("prune")
+
+
+def get_directory_size(path):
+    """Sum the size of all files below the given directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def list_worktrees():
+    """List all managed worktrees, most recently used first."""
+    if not os.path.isdir(WORKTREE_DIR):
+        return []
+
+    worktrees = []
+    for repo_name in os.listdir(WORKTREE_DIR):
+        repo_dir = os.path.join(WORKTREE_DIR, repo_name)
+        if not os.path.isdir(repo_dir):
+            continue
+        for commit_sha in os.listdir(repo_dir):
+            worktree_path = os.path.abspath(os.path.join(repo_dir, commit_sha))
+            if os.path.isdir(worktree_path):
+                worktrees.append(worktree_path)
+
+    return sorted(worktrees, key=os.path.getmtime, reverse=True)
+
+
+def prune_worktrees(keep=()):
+    """Remove the least recently used worktrees until the count and size budgets are met."""
+    keep = {os.path.abspath(path) for path in keep}
+    kept_count = 0
+    kept_size = 0
+
+    for worktree_path in list_worktrees():
+        size = get_directory_size(worktree_path) if WORKTREE_MAX_SIZE_MB else 0
+        if worktree_path in keep:
+            kept_count += 1
+            kept_size += size
+            continue
+
+        over_count = WORKTREE_MAX_COUNT and kept_count + 1 > WORKTREE_MAX_COUNT
+        over_size = WORKTREE_MAX_SIZE_MB and (kept_size + size) / (1024 * 1024) > WORKTREE_MAX_SIZE_MB
+
+        if over_count or over_size:
+            print(f"🧹 Removing worktree {worktree_path}")
+            remove_worktree(worktree_path)
+        else:
+            kept_count += 1
+            kept_size += size